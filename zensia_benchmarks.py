@@ -0,0 +1,415 @@
+# Zensia Benchmarks
+# Microbenchmarks for Zensia hot paths with JSON baselines
+#
+# Usage:
+#   python zensia_benchmarks.py run [names...] [--output results.json]
+#   python zensia_benchmarks.py compare baseline.json [results.json] [--threshold 0.10]
+#
+# Every metric is lower-is-better: microseconds per operation, or bytes for
+# metrics ending in _bytes.
+# Workloads are generated from a fixed seed and need no network access.
+
+import argparse
+import hashlib
+import json
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from zensia_core_implementation import Address, Hash
+from zensia_transactions import Transaction
+from zensia_blockchain import Block, BlockchainState, BlockHeader
+from zensia_consensus import ConsensusRound, Validator, ValidatorState, Vote
+from zensia_privacy import ConfidentialTransaction
+from zensia_note_cipher import encrypt_note, try_decrypt_many
+from zensia_wallet import WalletScanner
+from zensia_light_client import LightClient
+from zensia_consensus_wal import ConsensusWAL
+
+SEED = 0
+
+def _legacy_encrypt_note(value: int, blinding_factor: bytes, recipient_key: bytes) -> bytes:
+    """The original per-byte XOR loop, kept as a reference for comparison"""
+    plaintext = str(value).encode() + blinding_factor
+    key = hashlib.sha256(recipient_key).digest()
+    ciphertext = bytearray(len(plaintext))
+    for i in range(len(plaintext)):
+        ciphertext[i] = plaintext[i] ^ key[i % len(key)]
+    return bytes(ciphertext)
+
+def _time_per_op(fn: Callable[[], object], iterations: int) -> float:
+    """Return the best-of-three time per call in microseconds"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+def _time_with_setup(setup: Callable[[], object], fn: Callable[[object], object],
+                     ops: int, repeat: int = 3) -> float:
+    """Best-of-repeat time of fn(setup()) in microseconds per op, excluding setup"""
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best / ops * 1e6
+
+def _accounts(rng: random.Random, count: int) -> List[tuple]:
+    """Deterministic (private_key, public_key, address) triples"""
+    accounts = []
+    for _ in range(count):
+        private_key = rng.randbytes(32)
+        public_key = hashlib.sha256(private_key).digest()
+        accounts.append((private_key, public_key, Address.from_public_key(public_key)))
+    return accounts
+
+def _transfers(rng: random.Random, senders: List[tuple], count: int) -> List[Transaction]:
+    """Signed transfers between distinct accounts with correct per-sender nonces"""
+    nonces = [0] * len(senders)
+    txs = []
+    for _ in range(count):
+        i = rng.randrange(len(senders))
+        private_key, _, sender = senders[i]
+        recipient = senders[(i + rng.randrange(1, len(senders))) % len(senders)][2]
+        tx = Transaction.create(sender, recipient, rng.randrange(1, 100), nonces[i])
+        tx.sign(private_key)
+        nonces[i] += 1
+        txs.append(tx)
+    return txs
+
+def bench_hash() -> Dict[str, float]:
+    """Hash.from_bytes on small and block-sized inputs"""
+    rng = random.Random(SEED)
+    small, large = rng.randbytes(64), rng.randbytes(32 * 1000)
+    return {
+        "from_bytes_64b_us": _time_per_op(lambda: Hash.from_bytes(small), 50000),
+        "from_bytes_32kb_us": _time_per_op(lambda: Hash.from_bytes(large), 2000),
+    }
+
+def bench_transaction() -> Dict[str, float]:
+    """Transaction.create, sign and verify_signature"""
+    rng = random.Random(SEED)
+    (private_key, public_key, sender), (_, _, recipient) = _accounts(rng, 2)
+    tx = Transaction.create(sender, recipient, 10, 0)
+    tx.sign(private_key)
+    return {
+        "create_us": _time_per_op(lambda: Transaction.create(sender, recipient, 10, 0), 20000),
+        "sign_us": _time_per_op(lambda: tx.sign(private_key), 20000),
+        "verify_signature_us": _time_per_op(lambda: tx.verify_signature(private_key), 20000),
+    }
+
+def bench_block() -> Dict[str, float]:
+    """Block.create at 1k/10k/100k transactions and Block.block_hash"""
+    rng = random.Random(SEED)
+    senders = _accounts(rng, 100)
+    txs = _transfers(rng, senders, 100000)
+    previous_hash = Hash.from_bytes(b'genesis')
+    validator = senders[0][2]
+
+    results = {}
+    for size, iterations in ((1000, 50), (10000, 5), (100000, 1)):
+        subset = txs[:size]
+        results[f"create_{size}_us"] = _time_per_op(
+            lambda: Block.create(1, previous_hash, subset, validator), iterations)
+    block = Block.create(1, previous_hash, txs[:1000], validator)
+    results["block_hash_us"] = _time_per_op(lambda: block.block_hash, 20000)
+    return results
+
+def bench_apply_block() -> Dict[str, float]:
+    """BlockchainState.apply_block with 1k transparent transfers, per transaction"""
+    rng = random.Random(SEED)
+    senders = _accounts(rng, 100)
+    txs = _transfers(rng, senders, 1000)
+    block = Block.create(1, Hash.from_bytes(b'genesis'), txs, senders[0][2])
+
+    def setup() -> BlockchainState:
+        state = BlockchainState()
+        for _, _, address in senders:
+            state.get_account(address).balance = 10 ** 9
+        return state
+
+    return {"apply_block_1k_per_tx_us": _time_with_setup(setup, lambda s: s.apply_block(block), len(txs))}
+
+def bench_consensus() -> Dict[str, float]:
+    """ConsensusRound.add_vote with 10/100/1000 validators, per vote"""
+    rng = random.Random(SEED)
+    results = {}
+    for count in (10, 100, 1000):
+        validators = []
+        for _, public_key, address in _accounts(rng, count):
+            validator = Validator(address, public_key, stake=rng.randrange(1, 1000))
+            validator.state = ValidatorState.ACTIVE
+            validators.append(validator)
+        block_hash = Hash.from_bytes(b'block')
+        votes = [Vote(v.address, block_hash, 1, 0) for v in validators]
+
+        def add_all(round_: ConsensusRound) -> None:
+            for vote in votes:
+                round_.add_vote(vote)
+
+        results[f"add_vote_{count}_us"] = _time_with_setup(
+            lambda: ConsensusRound(1, 0, validators), add_all, count)
+    return results
+
+def bench_confidential() -> Dict[str, float]:
+    """ConfidentialTransaction.create with two inputs and two outputs"""
+    rng = random.Random(SEED)
+    sender_key = rng.randbytes(32)
+    inputs = [(rng.randbytes(32), 50, rng.randbytes(32)) for _ in range(2)]
+    outputs = [(Address(rng.randbytes(20)), 25) for _ in range(2)]
+    return {
+        "create_us": _time_per_op(
+            lambda: ConfidentialTransaction().create(inputs, outputs, sender_key), 5000),
+    }
+
+def bench_note_cipher(iterations: int = 20000) -> Dict[str, float]:
+    """Compare the legacy note XOR loop against the vectorized note cipher"""
+    rng = random.Random(SEED)
+    blinding = rng.randbytes(32)
+    recipient_key = rng.randbytes(20)
+    value = 123456789
+
+    results = {
+        "legacy_encrypt_us": _time_per_op(
+            lambda: _legacy_encrypt_note(value, blinding, recipient_key), iterations),
+        "encrypt_us": _time_per_op(
+            lambda: encrypt_note(value, blinding, recipient_key), iterations),
+    }
+
+    # Wallet scanning: 100 notes, 10 viewing keys, one of which owns each tenth note
+    keys: List[bytes] = [rng.randbytes(20) for _ in range(10)]
+    notes = [
+        encrypt_note(rng.randrange(10 ** 9), rng.randbytes(32),
+                     keys[0] if i % 10 == 0 else rng.randbytes(20))
+        for i in range(100)
+    ]
+    attempts = len(notes) * len(keys)
+    scan_us = _time_per_op(lambda: try_decrypt_many(notes, keys), max(1, iterations // attempts))
+    results["trial_decrypt_us"] = scan_us / attempts
+    return results
+
+def _confidential_chain(num_blocks: int, recipients: List[Address], seed: int) -> List[Block]:
+    """Build a chain with one single-output confidential transaction per block"""
+    rng = random.Random(seed)
+    blocks = []
+    previous_hash = Hash.from_bytes(b'genesis')
+    for height in range(1, num_blocks + 1):
+        conf_tx = ConfidentialTransaction()
+        conf_tx.create(
+            inputs=[(rng.randbytes(32), 1, rng.randbytes(32))],
+            outputs=[(rng.choice(recipients), rng.randrange(1, 10 ** 6))],
+            sender_private_key=rng.randbytes(32)
+        )
+        block = Block.create(height, previous_hash, [conf_tx], recipients[0])
+        blocks.append(block)
+        previous_hash = block.block_hash
+    return blocks
+
+def bench_wallet_scan(num_blocks: int = 2000, num_wallets: int = 200) -> Dict[str, float]:
+    """Wallet scan time per block with one worker and with every core"""
+    rng = random.Random(SEED)
+    wallets = [Address(rng.randbytes(20)) for _ in range(num_wallets)]
+    blocks = _confidential_chain(num_blocks, wallets, SEED)
+    keys = [bytes(w) for w in wallets]
+
+    results: Dict[str, float] = {}
+    for label, workers in (("1", 1), ("all", None)):
+        with ProcessPoolExecutor(workers) as executor:
+            scanner = WalletScanner(keys, executor=executor, workers=workers, blocks_per_batch=50)
+            start = time.perf_counter()
+            scanner.scan(blocks)
+            results[f"per_block_{label}_workers_us"] = (time.perf_counter() - start) / num_blocks * 1e6
+    return results
+
+def bench_light_client(num_blocks: int = 200, txs_per_block: int = 200) -> Dict[str, float]:
+    """Header sync and proof checks against full block replay, per block"""
+    rng = random.Random(SEED)
+    senders = _accounts(rng, 100)
+    validator_key, _, validator = senders[0]
+
+    def funded_state() -> BlockchainState:
+        state = BlockchainState()
+        for _, _, address in senders:
+            state.get_account(address).balance = 10 ** 9
+        return state
+
+    def sync(client: LightClient, headers: List[BlockHeader]) -> None:
+        for i in range(0, num_blocks, 50):
+            client.sync_headers(headers[i:i + 50])
+
+    # Memory: a full node keeps every block and the replayed state, a light
+    # client only itself and its synced headers; both traced the same way
+    tracemalloc.start()
+    state = funded_state()
+    blocks = []
+    previous_hash = Hash.from_bytes(b'genesis')
+    txs = _transfers(rng, senders, num_blocks * txs_per_block)
+    for height in range(1, num_blocks + 1):
+        chunk = txs[(height - 1) * txs_per_block:height * txs_per_block]
+        block = Block.create(height, previous_hash, chunk, validator)
+        block.sign(validator_key)
+        blocks.append(block)
+        previous_hash = block.block_hash
+    del txs
+    for block in blocks:
+        state.apply_block(block)
+    full_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    headers = [block.header() for block in blocks]
+    tracemalloc.start()
+    client = LightClient({validator: validator_key}, trusted_hash=Hash.from_bytes(b'genesis'))
+    sync(client, headers)
+    light_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del state, client
+
+    # Timing, untraced, on fresh instances
+    state = funded_state()
+    start = time.perf_counter()
+    for block in blocks:
+        state.apply_block(block)
+    full_us = (time.perf_counter() - start) / num_blocks * 1e6
+
+    client = LightClient({validator: validator_key}, trusted_hash=Hash.from_bytes(b'genesis'))
+    start = time.perf_counter()
+    sync(client, headers)
+    light_us = (time.perf_counter() - start) / num_blocks * 1e6
+
+    block = blocks[-1]
+    tx_hash, proof = block.merkle_proof(txs_per_block // 2)
+    proof_us = _time_per_op(
+        lambda: client.verify_transaction(block.height, tx_hash, txs_per_block // 2, proof), 5000)
+
+    return {
+        "full_replay_per_block_us": full_us,
+        "header_sync_per_block_us": light_us,
+        "verify_proof_us": proof_us,
+        "full_node_bytes": full_bytes,
+        "light_client_bytes": light_bytes,
+    }
+
+def bench_consensus_wal(writers: int = 8, votes_per_writer: int = 200) -> Dict[str, float]:
+    """Durable vote logging from concurrent writers, with and without group commit"""
+    rng = random.Random(SEED)
+    votes = []
+    for _, _, address in _accounts(rng, writers):
+        votes.append([Vote(address, Hash.from_bytes(rng.randbytes(8)), 1, 0) for _ in range(votes_per_writer)])
+        for vote in votes[-1]:
+            vote.sign(rng.randbytes(32))
+
+    results = {}
+    for label, group_commit in (("group_commit", True), ("fsync_each", False)):
+        with tempfile.TemporaryDirectory() as directory:
+            wal = ConsensusWAL(directory, group_commit=group_commit)
+            threads = [threading.Thread(target=lambda vs=vs: [wal.log_own_vote(v) for v in vs])
+                       for vs in votes]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            wal.close()
+        results[f"per_vote_{label}_us"] = elapsed / (writers * votes_per_writer) * 1e6
+    return results
+
+BENCHMARKS: Dict[str, Callable[[], Dict[str, float]]] = {
+    "hash": bench_hash,
+    "transaction": bench_transaction,
+    "block": bench_block,
+    "apply_block": bench_apply_block,
+    "consensus": bench_consensus,
+    "confidential": bench_confidential,
+    "note_cipher": bench_note_cipher,
+    "wallet_scan": bench_wallet_scan,
+    "light_client": bench_light_client,
+    "consensus_wal": bench_consensus_wal,
+}
+
+def run(names: Optional[List[str]] = None) -> Dict:
+    """Run the named benchmarks (all by default) and return a results document"""
+    results: Dict[str, float] = {}
+    for name in names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark: {name}")
+        for metric, value in BENCHMARKS[name]().items():
+            results[f"{name}.{metric}"] = value
+            print(f"{name}.{metric}: {value:.3f}")
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": int(time.time()),
+        "results": results,
+    }
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Return the metrics that got slower than baseline by more than threshold or are missing"""
+    regressions = []
+    for metric, base in sorted(baseline["results"].items()):
+        value = current["results"].get(metric)
+        if value is None:
+            print(f"{metric}: {base:.3f} -> missing MISSING")
+            regressions.append(metric)
+            continue
+        if base <= 0:
+            continue
+        change = value / base - 1
+        status = "REGRESSION" if change > threshold else "ok"
+        print(f"{metric}: {base:.3f} -> {value:.3f} ({change:+.1%}) {status}")
+        if change > threshold:
+            regressions.append(metric)
+    return regressions
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Zensia hot path benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("names", nargs="*", help=f"subset of: {', '.join(BENCHMARKS)}")
+    run_parser.add_argument("--output", help="write results JSON (e.g. a new baseline) to this path")
+
+    compare_parser = commands.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline", help="baseline results JSON")
+    compare_parser.add_argument("current", nargs="?", help="results JSON; benchmarks are run if omitted")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="allowed slowdown as a fraction (default 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        try:
+            document = run(args.names)
+        except ValueError as e:
+            print(e)
+            return 1
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(document, f, indent=2, sort_keys=True)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        names = sorted({metric.split(".")[0] for metric in baseline["results"]} & set(BENCHMARKS))
+        current = run(names)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} or missing metric(s)")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -4,10 +4,117 @@ import time
 import hashlib
 import base64
 from dataclasses import dataclass
-from typing import Dict, List, Union, Optional, Set
+from typing import Dict, List, Union, Optional, Set, Tuple
 from zensia_core_implementation import Hash, Address
 from zensia_transactions import Transaction
-from zensia_privacy import ConfidentialTransaction
+from zensia_privacy import ConfidentialTransaction, ProofVerificationCache
+from zensia_metrics import metrics
+
+# Reasons a transaction can be rejected by BlockchainState.check_transaction
+REJECT_INSUFFICIENT_FUNDS = "insufficient_funds"
+REJECT_INVALID_NONCE = "invalid_nonce"
+REJECT_NULLIFIER_SPENT = "nullifier_spent"
+REJECT_INVALID_PROOF = "invalid_proof"
+
+class InvalidTransactionError(ValueError):
+    """Raised when a block contains a transaction that fails validation"""
+    
+    def __init__(self, reason: str):
+        super().__init__(f"Block contains invalid transaction: {reason}")
+        self.reason = reason
+
+MERKLE_LEAF_PREFIX = b'\x00'
+MERKLE_NODE_PREFIX = b'\x01'
+
+def _merkle_leaf(leaf: Hash) -> Hash:
+    return Hash.from_bytes(MERKLE_LEAF_PREFIX + leaf)
+
+def _merkle_node(left: Hash, right: Hash) -> Hash:
+    return Hash.from_bytes(MERKLE_NODE_PREFIX + left + right)
+
+def _merkle_level(level: List[Hash]) -> List[Hash]:
+    """Hash pairs of nodes; an odd last node is promoted to the next level unchanged"""
+    parents = [_merkle_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+def merkle_root(leaves: List[Hash]) -> Hash:
+    """
+    Compute the root of a binary Merkle tree
+
+    Leaves and inner nodes are hashed with distinct prefixes, so an inner
+    node can't pass as a leaf, and an odd last node is promoted rather than
+    duplicated, so no two leaf lists share a root.
+    """
+    if not leaves:
+        return Hash.from_bytes(b'')
+    level = [_merkle_leaf(leaf) for leaf in leaves]
+    while len(level) > 1:
+        level = _merkle_level(level)
+    return level[0]
+
+def merkle_proof(leaves: List[Hash], index: int) -> List[Hash]:
+    """Sibling hashes from leaf to root proving leaves[index] is in the tree"""
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"Leaf index {index} out of range")
+    proof = []
+    level = [_merkle_leaf(leaf) for leaf in leaves]
+    while len(level) > 1:
+        if index ^ 1 < len(level):
+            proof.append(level[index ^ 1])
+        level = _merkle_level(level)
+        index //= 2
+    return proof
+
+def verify_merkle_proof(leaf: Hash, index: int, proof: List[Hash], root: Hash, leaf_count: int) -> bool:
+    """Check a proof produced by merkle_proof against the root of a tree of leaf_count leaves"""
+    if not 0 <= index < leaf_count:
+        return False
+    node = _merkle_leaf(leaf)
+    remaining = iter(proof)
+    width = leaf_count
+    while width > 1:
+        if index ^ 1 < width:
+            sibling = next(remaining, None)
+            if sibling is None:
+                return False
+            node = _merkle_node(sibling, node) if index & 1 else _merkle_node(node, sibling)
+        index //= 2
+        width = (width + 1) // 2
+    return next(remaining, None) is None and node == root
+
+def _header_hash(height: int, previous_hash: Hash, merkle_root: Hash,
+                 timestamp: int, validator: Address, tx_count: int) -> Hash:
+    block_data = f"{height}{previous_hash}{merkle_root}{timestamp}{validator}{tx_count}".encode('utf-8')
+    return Hash.from_bytes(block_data)
+
+def _block_signature(block_hash: Hash, validator: Address, key: bytes) -> bytes:
+    message = f"{block_hash}{validator}".encode('utf-8')
+    return hashlib.sha256(message + key).digest()
+
+@dataclass
+class BlockHeader:
+    """The fields of a block that commit to its contents, without the transactions"""
+    height: int
+    previous_hash: Hash
+    merkle_root: Hash
+    tx_count: int  # Number of Merkle leaves, needed to check proof shape
+    timestamp: int
+    validator: Address
+    signature: Optional[bytes] = None
+    
+    @property
+    def block_hash(self) -> Hash:
+        """Calculate the hash of the block this header belongs to"""
+        return _header_hash(self.height, self.previous_hash, self.merkle_root,
+                            self.timestamp, self.validator, self.tx_count)
+    
+    def verify_signature(self, validator_public_key: bytes) -> bool:
+        """Verify the block signature"""
+        if not self.signature:
+            return False
+        return self.signature == _block_signature(self.block_hash, self.validator, validator_public_key)
 
 @dataclass
 class Block:
@@ -23,8 +130,16 @@ class Block:
     @property
     def block_hash(self) -> Hash:
         """Calculate the hash of this block"""
-        block_data = f"{self.height}{self.previous_hash}{self.merkle_root}{self.timestamp}{self.validator}".encode('utf-8')
-        return Hash.from_bytes(block_data)
+        return _header_hash(self.height, self.previous_hash, self.merkle_root,
+                            self.timestamp, self.validator, len(self.transactions))
+    
+    @staticmethod
+    def transaction_hash(tx: Union[Transaction, ConfidentialTransaction]) -> Hash:
+        """Hash identifying a transaction as a Merkle leaf"""
+        if isinstance(tx, Transaction):
+            return tx.tx_hash
+        # Use first commitment as a proxy for transaction hash
+        return Hash.from_bytes(tx.commitments[0] if tx.commitments else b'')
     
     @classmethod
     def create(cls, height: int, previous_hash: Hash, 
@@ -32,46 +147,37 @@ class Block:
                validator: Address) -> 'Block':
         """Create a new unsigned block"""
         # Calculate merkle root from transactions
-        # Simplified for demonstration
-        tx_hashes = []
-        for tx in transactions:
-            if isinstance(tx, Transaction):
-                tx_hashes.append(tx.tx_hash)
-            else:  # ConfidentialTransaction
-                # Use first commitment as a proxy for transaction hash
-                tx_hashes.append(Hash.from_bytes(tx.commitments[0] if tx.commitments else b''))
-        
-        # Simple merkle root calculation (not a proper Merkle tree)
-        merkle_data = b''.join(tx_hashes)
-        merkle_root = Hash.from_bytes(merkle_data)
+        root = merkle_root([cls.transaction_hash(tx) for tx in transactions])
         
         timestamp = int(time.time())
         
         return cls(
             height=height,
             previous_hash=previous_hash,
-            merkle_root=merkle_root,
+            merkle_root=root,
             timestamp=timestamp,
             validator=validator,
             transactions=transactions
         )
     
+    def header(self) -> BlockHeader:
+        """Return the header of this block"""
+        return BlockHeader(self.height, self.previous_hash, self.merkle_root, len(self.transactions),
+                           self.timestamp, self.validator, self.signature)
+    
+    def merkle_proof(self, index: int) -> Tuple[Hash, List[Hash]]:
+        """Return (transaction hash, Merkle proof) for the transaction at index"""
+        leaves = [self.transaction_hash(tx) for tx in self.transactions]
+        return leaves[index], merkle_proof(leaves, index)
+    
     def sign(self, validator_private_key: bytes) -> None:
         """Sign the block with the validator's private key"""
         # In a real implementation, this would use proper digital signatures
-        block_hash = self.block_hash
-        message = f"{block_hash}{self.validator}".encode('utf-8')
-        self.signature = hashlib.sha256(message + validator_private_key).digest()
+        self.signature = _block_signature(self.block_hash, self.validator, validator_private_key)
     
     def verify_signature(self, validator_public_key: bytes) -> bool:
         """Verify the block signature"""
-        if not self.signature:
-            return False
-            
-        block_hash = self.block_hash
-        message = f"{block_hash}{self.validator}".encode('utf-8')
-        expected_sig = hashlib.sha256(message + validator_public_key).digest()
-        return self.signature == expected_sig
+        return self.header().verify_signature(validator_public_key)
     
     def to_json(self) -> Dict:
         """Convert block to JSON-serializable dictionary"""
@@ -110,7 +216,7 @@ class AccountState:
 class BlockchainState:
     """Manages the overall state of the blockchain"""
     
-    def __init__(self):
+    def __init__(self, verification_cache: Optional[ProofVerificationCache] = None):
         self.accounts: Dict[str, AccountState] = {}  # address -> state
         self.height: int = 0
         self.last_block_hash: Optional[Hash] = None
@@ -118,6 +224,11 @@ class BlockchainState:
         # For confidential transactions
         self.nullifier_set: Set[bytes] = set()  # Set of spent nullifiers
         self.commitment_set: Set[bytes] = set()  # Set of existing commitments
+        
+        # Proof results shared with the transaction pool so proofs are verified once
+        if verification_cache is None:
+            verification_cache = ProofVerificationCache()
+        self.verification_cache = verification_cache
     
     def get_account(self, address: Address) -> AccountState:
         """Get account state for an address, create if not exists"""
@@ -126,30 +237,44 @@ class BlockchainState:
             self.accounts[addr_str] = AccountState(address)
         return self.accounts[addr_str]
     
-    def validate_transaction(self, tx: Union[Transaction, ConfidentialTransaction]) -> bool:
-        """Validate if a transaction is valid according to current state"""
+    def check_transaction(self, tx: Union[Transaction, ConfidentialTransaction]) -> Optional[str]:
+        """Check a transaction against current state, returning the rejection reason or None"""
         if isinstance(tx, Transaction):
             # Regular transaction validation
             sender = self.get_account(tx.sender)
             
             # Check balance and nonce
             if sender.balance < tx.amount:
-                return False  # Insufficient funds
+                return REJECT_INSUFFICIENT_FUNDS
                 
             if sender.nonce != tx.nonce:
-                return False  # Invalid nonce
+                return REJECT_INVALID_NONCE
                 
-            return True
+            return None
         else:
             # Confidential transaction validation
             
             # Check for double spends
             for nullifier in tx.nullifiers:
                 if nullifier in self.nullifier_set:
-                    return False  # Nullifier already spent
+                    return REJECT_NULLIFIER_SPENT
             
-            # Verify zk proof
-            return tx.verify()
+            # Verify zk proof (cached; only the nullifier checks above repeat)
+            if not self.verification_cache.verify(tx):
+                return REJECT_INVALID_PROOF
+            return None
+    
+    def check_and_record(self, tx: Union[Transaction, ConfidentialTransaction]) -> Optional[str]:
+        """check_transaction, timed and with rejections counted by reason"""
+        with metrics.time("validate_transaction"):
+            reason = self.check_transaction(tx)
+        if reason is not None:
+            metrics.inc("rejected_transactions_total", reason=reason)
+        return reason
+    
+    def validate_transaction(self, tx: Union[Transaction, ConfidentialTransaction]) -> bool:
+        """Validate if a transaction is valid according to current state"""
+        return self.check_and_record(tx) is None
     
     def apply_transaction(self, tx: Union[Transaction, ConfidentialTransaction]) -> None:
         """Apply a transaction to the state"""
@@ -172,17 +297,30 @@ class BlockchainState:
     
     def apply_block(self, block: Block) -> None:
         """Apply a block to the state"""
+        with metrics.time("apply_block"), metrics.profile_block_import():
+            self._apply_block(block)
+        
+        metrics.set_gauge("accounts", len(self.accounts))
+        metrics.set_gauge("nullifiers", len(self.nullifier_set))
+        metrics.set_gauge("commitments", len(self.commitment_set))
+        metrics.set_gauge("height", self.height)
+    
+    def _apply_block(self, block: Block) -> None:
         # Validate block height and previous hash
         if block.height != self.height + 1:
+            metrics.inc("rejected_blocks_total", reason="invalid_height")
             raise ValueError(f"Invalid block height: expected {self.height + 1}, got {block.height}")
         
         if self.last_block_hash and block.previous_hash != self.last_block_hash:
+            metrics.inc("rejected_blocks_total", reason="previous_hash_mismatch")
             raise ValueError("Block's previous hash doesn't match current last hash")
         
         # Apply all transactions
         for tx in block.transactions:
-            if not self.validate_transaction(tx):
-                raise ValueError(f"Block contains invalid transaction")
+            reason = self.check_and_record(tx)
+            if reason is not None:
+                metrics.inc("rejected_blocks_total", reason="invalid_transaction")
+                raise InvalidTransactionError(reason)
             self.apply_transaction(tx)
         
         # Update blockchain state
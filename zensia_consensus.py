@@ -5,6 +5,8 @@ from enum import Enum
 from typing import Dict, List, Tuple, Optional
 from zensia_core_implementation import Hash, Address
 from zensia_blockchain import Block
+from zensia_metrics import metrics
+from zensia_consensus_wal import ConsensusWAL, WALState
 
 class ValidatorState(Enum):
     ACTIVE = "active"
@@ -72,37 +74,45 @@ class ConsensusRound:
         self.proposed_block = None
         self.votes: Dict[str, Vote] = {}  # validator_address -> vote
         self.voted_stake = 0
+        self.block_stake: Dict[Hash, int] = {}  # block_hash -> stake voted for it
     
     def add_vote(self, vote: Vote) -> bool:
         """Add a validator's vote to this round"""
         if vote.height != self.height or vote.round != self.round:
+            metrics.inc("rejected_votes_total", reason="wrong_round")
             return False
             
         validator_addr = vote.validator.to_hex()
         
         # Ensure validator hasn't already voted
         if validator_addr in self.votes:
+            metrics.inc("rejected_votes_total", reason="duplicate")
             return False
             
         # Find the validator
         validator = next((v for v in self.validators if v.address == vote.validator), None)
         if not validator or validator.state != ValidatorState.ACTIVE:
+            metrics.inc("rejected_votes_total", reason="inactive_validator")
             return False
             
         # Add the vote
         self.votes[validator_addr] = vote
         self.voted_stake += validator.stake
+        self.block_stake[vote.block_hash] = self.block_stake.get(vote.block_hash, 0) + validator.stake
         
         return True
     
     def has_consensus(self) -> bool:
-        """Check if we have enough votes for consensus"""
-        return self.voted_stake >= self.threshold
+        """Check if votes for the proposed block carry enough stake for consensus"""
+        with metrics.time("has_consensus"):
+            if self.proposed_block is None:
+                return False
+            return self.block_stake.get(self.proposed_block.block_hash, 0) >= self.threshold
 
 class BFTConsensus:
     """Byzantine Fault Tolerance consensus implementation"""
     
-    def __init__(self, validators: List[Validator]):
+    def __init__(self, validators: List[Validator], wal: Optional[ConsensusWAL] = None):
         self.validators = validators
         self.active_validators = [v for v in validators if v.state == ValidatorState.ACTIVE]
         self.current_height = 1  # Start at height 1 to match block height
@@ -110,12 +120,61 @@ class BFTConsensus:
         self.rounds: Dict[Tuple[int, int], ConsensusRound] = {}  # (height, round) -> round_state
         self.finalized_blocks: Dict[int, Block] = {}  # height -> block
         
+        # Proposals seen before a restart; the blocks themselves must be re-fetched
+        self.recovered_proposals: Dict[Tuple[int, int], Hash] = {}  # (height, round) -> block_hash
+        self.wal = wal
+        
         # Initialize the first consensus round
         self.rounds[(self.current_height, self.current_round)] = ConsensusRound(
             self.current_height,
             self.current_round,
             self.validators
         )
+        
+        if wal is not None:
+            self._restore(wal.replay())
+    
+    def _restore(self, wal_state: WALState) -> None:
+        """Rebuild heights, rounds and votes from a replayed write-ahead log"""
+        height, last_round = wal_state.last_height_round
+        self.current_height = max(height, wal_state.finalized_height + 1)
+        self.current_round = last_round if height == self.current_height else 0
+        self.rounds = {}
+        for round_num in range(self.current_round + 1):
+            self.rounds[(self.current_height, round_num)] = ConsensusRound(
+                self.current_height, round_num, self.validators)
+        
+        self.recovered_proposals = dict(wal_state.proposals)
+        
+        for vote_record in wal_state.votes:
+            current_round = self.rounds.get((vote_record.height, vote_record.round))
+            if current_round is None:
+                continue
+            vote = Vote(vote_record.validator, vote_record.block_hash,
+                        vote_record.height, vote_record.round)
+            vote.timestamp = vote_record.timestamp
+            vote.signature = vote_record.signature
+            # Peer votes get the same checks as when they were first received
+            if not vote_record.own and self._check_peer_vote(vote) is not None:
+                continue
+            current_round.add_vote(vote)
+    
+    def _proposed_hash(self, round_key: Tuple[int, int]) -> Optional[Hash]:
+        """Hash of the block proposed at (height, round), from this run or the WAL"""
+        current_round = self.rounds.get(round_key)
+        if current_round is not None and current_round.proposed_block is not None:
+            return current_round.proposed_block.block_hash
+        return self.recovered_proposals.get(round_key)
+    
+    def _check_peer_vote(self, vote: Vote) -> Optional[str]:
+        """Check a peer's vote signature and block hash, returning the rejection reason or None"""
+        validator = next((v for v in self.validators if v.address == vote.validator), None)
+        if validator is None or not vote.verify(validator.public_key):
+            return "invalid_signature"
+        proposed_hash = self._proposed_hash((vote.height, vote.round))
+        if proposed_hash is not None and vote.block_hash != proposed_hash:
+            return "wrong_block"
+        return None
     
     def get_current_proposer(self) -> Optional[Validator]:
         """Get the current block proposer based on height and round"""
@@ -135,12 +194,19 @@ class BFTConsensus:
             self.current_round,
             self.validators
         )
+        metrics.set_gauge("consensus_rounds", len(self.rounds))
+        metrics.set_gauge("consensus_round", self.current_round)
     
     def propose_block(self, block: Block, proposer: Address, private_key: bytes) -> bool:
         """Validator proposes a block for the current height/round"""
+        with metrics.time("propose_block"):
+            return self._propose_block(block, proposer, private_key)
+    
+    def _propose_block(self, block: Block, proposer: Address, private_key: bytes) -> bool:
         # Check if the proposer is the expected one
         current_proposer = self.get_current_proposer()
         if not current_proposer or current_proposer.address != proposer:
+            metrics.inc("rejected_proposals_total", reason="wrong_proposer")
             return False
             
         round_key = (self.current_height, self.current_round)
@@ -153,16 +219,29 @@ class BFTConsensus:
         
         # Ensure block height matches current consensus height
         if block.height != self.current_height:
+            metrics.inc("rejected_proposals_total", reason="wrong_height")
             return False
             
-        # Sign the block
+        # Never sign a second block for a (height, round), even across restarts
+        proposed_hash = self._proposed_hash(round_key)
+        if proposed_hash is not None and proposed_hash != block.block_hash:
+            metrics.inc("rejected_proposals_total", reason="equivocation")
+            return False
+        
+        # Sign the block and make the proposal durable before it can be broadcast
         block.sign(private_key)
+        if self.wal is not None:
+            self.wal.log_proposal(self.current_height, self.current_round, block.block_hash)
         current_round.proposed_block = block
         
         return True
     
     def vote_for_block(self, validator: Address, block_hash: Hash, private_key: bytes) -> bool:
         """Validator votes for a proposed block"""
+        with metrics.time("vote_for_block"):
+            return self._vote_for_block(validator, block_hash, private_key)
+    
+    def _vote_for_block(self, validator: Address, block_hash: Hash, private_key: bytes) -> bool:
         round_key = (self.current_height, self.current_round)
         if round_key not in self.rounds:
             return False
@@ -176,6 +255,10 @@ class BFTConsensus:
         # Add the vote to current round
         if not current_round.add_vote(vote):
             return False
+        
+        # Make the signed vote durable before it can be broadcast
+        if self.wal is not None:
+            self.wal.log_own_vote(vote)
             
         # Check if we have consensus
         if current_round.has_consensus() and current_round.proposed_block:
@@ -183,9 +266,33 @@ class BFTConsensus:
             
         return True
     
+    def receive_vote(self, vote: Vote) -> bool:
+        """Add a vote signed by another validator to the current round"""
+        round_key = (self.current_height, self.current_round)
+        if round_key not in self.rounds:
+            return False
+            
+        current_round = self.rounds[round_key]
+        reason = self._check_peer_vote(vote)
+        if reason is not None:
+            metrics.inc("rejected_votes_total", reason=reason)
+            return False
+        if not current_round.add_vote(vote):
+            return False
+        
+        if self.wal is not None:
+            self.wal.log_received_vote(vote)
+        
+        if current_round.has_consensus() and current_round.proposed_block:
+            self._finalize_block(current_round.proposed_block)
+        
+        return True
+    
     def _finalize_block(self, block: Block) -> None:
         """Finalize a block with consensus"""
         self.finalized_blocks[block.height] = block
+        if self.wal is not None:
+            self.wal.mark_finalized(block.height)
         self.current_height += 1
         self.current_round = 0
         
@@ -195,4 +302,8 @@ class BFTConsensus:
             self.current_height,
             self.current_round,
             self.validators
-        )
\ No newline at end of file
+        )
+        metrics.inc("finalized_blocks_total")
+        metrics.set_gauge("consensus_height", self.current_height)
+        metrics.set_gauge("consensus_rounds", len(self.rounds))
+        metrics.set_gauge("consensus_round", self.current_round)
\ No newline at end of file
@@ -0,0 +1,312 @@
+# Zensia Consensus Write-Ahead Log
+# Crash-safe record of proposals and votes with group-commit fsync
+
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from zensia_core_implementation import Hash, Address
+
+RECORD_PROPOSAL = 1
+RECORD_OWN_VOTE = 2
+RECORD_RECEIVED_VOTE = 3
+RECORD_FINALIZED = 4
+
+# length and crc32 of the record body (type byte + payload)
+RECORD_HEADER = struct.Struct(">II")
+# validator, block_hash, height, round, timestamp, signature
+VOTE_FORMAT = struct.Struct(">20s32sQQQ32s")
+# height, round, block_hash
+PROPOSAL_FORMAT = struct.Struct(">QQ32s")
+FINALIZED_FORMAT = struct.Struct(">Q")
+
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+class WALFailedError(IOError):
+    """Raised once a WAL write has failed; records not yet durable may be lost"""
+
+@dataclass
+class VoteRecord:
+    """A logged vote"""
+    validator: Address
+    block_hash: Hash
+    height: int
+    round: int
+    timestamp: int
+    signature: bytes
+    own: bool
+
+@dataclass
+class WALState:
+    """Consensus state recovered from the log"""
+    finalized_height: int = 0
+    proposals: Dict[Tuple[int, int], Hash] = field(default_factory=dict)  # (height, round) -> block_hash
+    votes: List[VoteRecord] = field(default_factory=list)
+
+    @property
+    def last_height_round(self) -> Tuple[int, int]:
+        """Highest (height, round) with activity above the finalized height"""
+        keys = [k for k in self.proposals if k[0] > self.finalized_height]
+        keys += [(v.height, v.round) for v in self.votes if v.height > self.finalized_height]
+        return max(keys, default=(self.finalized_height + 1, 0))
+
+def _encode(record_type: int, payload: bytes) -> bytes:
+    body = bytes([record_type]) + payload
+    return RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+def encode_vote(vote, own: bool) -> bytes:
+    """Encode a Vote (or VoteRecord) as a WAL record"""
+    payload = VOTE_FORMAT.pack(vote.validator, vote.block_hash, vote.height, vote.round,
+                               vote.timestamp, vote.signature or b'')
+    return _encode(RECORD_OWN_VOTE if own else RECORD_RECEIVED_VOTE, payload)
+
+class ConsensusWAL:
+    """
+    Segmented, append-only consensus log
+
+    Writers that need durability block until an fsync covers their record.
+    With group_commit, whichever waiting writer finds no flush in progress
+    writes and fsyncs every pending record at once while the others wait,
+    so concurrent writers share one fsync instead of paying one each.
+    """
+
+    def __init__(self, directory: str, segment_size: int = 16 * 1024 * 1024,
+                 group_commit: bool = True):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.group_commit = group_commit
+        os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._appended = 0  # sequence number of the last appended record
+        self._synced = 0  # sequence number of the last durable record
+        self._flushing = False
+        self._failure = None  # first write error; the WAL refuses all work after it
+
+        # segment index -> highest height recorded in it
+        self._segment_heights: Dict[int, int] = {}
+        self._pending_height = 0
+        self._segment_index = 0
+        self._file = None
+        self.fsyncs = 0
+
+    # Segment handling
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{index:08d}{SEGMENT_SUFFIX}")
+
+    def _segments(self) -> List[int]:
+        indexes = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                indexes.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(indexes)
+
+    def _open_segment(self, index: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._segment_index = index
+        self._file = open(self._segment_path(index), "ab")
+        self._segment_heights.setdefault(index, 0)
+
+    def _sync_directory(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # Writing
+
+    def _write_batch(self, batch: List[bytes], max_height: int) -> None:
+        """Write and fsync records; called by exactly one writer at a time"""
+        if self._file is None:
+            segments = self._segments()
+            self._open_segment(segments[-1] if segments else 0)
+        elif self._file.tell() >= self.segment_size:
+            self._open_segment(self._segment_index + 1)
+            self._sync_directory()
+        self._file.write(b''.join(batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+        index = self._segment_index
+        self._segment_heights[index] = max(self._segment_heights[index], max_height)
+
+    def _check_failed(self) -> None:
+        """Raise if an earlier write failed (lock held)"""
+        if self._failure is not None:
+            raise WALFailedError("Consensus WAL write failed") from self._failure
+
+    def _wait_durable(self, seq: int) -> None:
+        """
+        Block until record seq is fsynced, leading a flush if none is running (lock held)
+
+        Raises:
+            WALFailedError: If a write failed; every writer whose record
+                isn't durable yet gets the error, and the WAL stays failed
+        """
+        while self._synced < seq:
+            self._check_failed()
+            if self._flushing:
+                self._cond.wait()
+                continue
+            self._flushing = True
+            batch, self._pending = self._pending, []
+            max_height, self._pending_height = self._pending_height, 0
+            target = self._appended
+            self._cond.release()
+            try:
+                self._write_batch(batch, max_height)
+            except BaseException as e:
+                self._cond.acquire()
+                self._failure = e
+                self._flushing = False
+                self._cond.notify_all()
+                self._check_failed()
+            self._cond.acquire()
+            self._flushing = False
+            self._synced = max(self._synced, target)
+            self._cond.notify_all()
+
+    def append(self, record: bytes, height: int, sync: bool = True) -> int:
+        """
+        Append an encoded record
+
+        Args:
+            record: An encoded WAL record
+            height: Consensus height the record belongs to
+            sync: Block until the record is durable
+
+        Returns:
+            Sequence number of the record
+
+        Raises:
+            WALFailedError: If this or an earlier write failed
+        """
+        with self._cond:
+            self._check_failed()
+            if sync and not self.group_commit:
+                # Without group commit each durable record gets its own fsync
+                while self._flushing:
+                    self._cond.wait()
+            self._pending.append(record)
+            self._pending_height = max(self._pending_height, height)
+            self._appended += 1
+            seq = self._appended
+            if sync:
+                self._wait_durable(seq)
+            return seq
+
+    def sync(self) -> None:
+        """Make every appended record durable"""
+        with self._cond:
+            self._wait_durable(self._appended)
+
+    def log_proposal(self, height: int, round_num: int, block_hash: Hash) -> None:
+        self.append(_encode(RECORD_PROPOSAL, PROPOSAL_FORMAT.pack(height, round_num, block_hash)), height)
+
+    def log_own_vote(self, vote) -> None:
+        """Durably log a vote this node signed; must complete before the vote is sent"""
+        self.append(encode_vote(vote, True), vote.height)
+
+    def log_received_vote(self, vote) -> None:
+        """Log a peer's vote; it becomes durable with the next fsync"""
+        self.append(encode_vote(vote, False), vote.height, sync=False)
+
+    def mark_finalized(self, height: int) -> None:
+        """
+        Record that height is final and drop segments no longer needed
+
+        A fresh segment is started with the finalization marker, then older
+        segments holding nothing above the finalized height are deleted.
+        """
+        record = _encode(RECORD_FINALIZED, FINALIZED_FORMAT.pack(height))
+        self.sync()
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            self._check_failed()
+            self._flushing = True
+        try:
+            self._open_segment(self._segment_index + 1 if self._file is not None
+                               else (self._segments() or [-1])[-1] + 1)
+            self._write_batch([record], height)
+            for index in list(self._segment_heights):
+                if index != self._segment_index and self._segment_heights[index] <= height:
+                    os.remove(self._segment_path(index))
+                    del self._segment_heights[index]
+            self._sync_directory()
+        except BaseException as e:
+            with self._cond:
+                self._failure = e
+            raise
+        finally:
+            with self._cond:
+                self._flushing = False
+                self._cond.notify_all()
+                self._cond.notify_all()
+
+    # Recovery
+
+    def replay(self) -> WALState:
+        """
+        Read every segment and rebuild consensus state
+
+        A torn record at the end of the last segment (from a crash mid-write)
+        is truncated away; corruption anywhere else raises ValueError.
+        """
+        state = WALState()
+        segments = self._segments()
+        for position, index in enumerate(segments):
+            path = self._segment_path(index)
+            with open(path, "rb") as f:
+                data = f.read()
+            offset, max_height = 0, 0
+            while offset < len(data):
+                start = offset + RECORD_HEADER.size
+                body = b''
+                if start <= len(data):
+                    length, crc = RECORD_HEADER.unpack_from(data, offset)
+                    body = data[start:start + length]
+                if not body or len(body) != length or zlib.crc32(body) != crc:
+                    if position != len(segments) - 1:
+                        raise ValueError(f"Corrupt WAL segment {path} at offset {offset}")
+                    with open(path, "r+b") as f:
+                        f.truncate(offset)
+                    break
+                max_height = max(max_height, self._apply(state, body[0], body[1:]))
+                offset = start + length
+            self._segment_heights[index] = max_height
+
+        # Drop records already covered by finalization
+        state.proposals = {k: v for k, v in state.proposals.items() if k[0] > state.finalized_height}
+        state.votes = [v for v in state.votes if v.height > state.finalized_height]
+        return state
+
+    @staticmethod
+    def _apply(state: WALState, record_type: int, payload: bytes) -> int:
+        if record_type == RECORD_PROPOSAL:
+            height, round_num, block_hash = PROPOSAL_FORMAT.unpack(payload)
+            state.proposals[(height, round_num)] = Hash(block_hash)
+            return height
+        if record_type in (RECORD_OWN_VOTE, RECORD_RECEIVED_VOTE):
+            validator, block_hash, height, round_num, timestamp, signature = VOTE_FORMAT.unpack(payload)
+            state.votes.append(VoteRecord(Address(validator), Hash(block_hash), height, round_num,
+                                          timestamp, signature, record_type == RECORD_OWN_VOTE))
+            return height
+        if record_type == RECORD_FINALIZED:
+            (height,) = FINALIZED_FORMAT.unpack(payload)
+            state.finalized_height = max(state.finalized_height, height)
+            return height
+        raise ValueError(f"Unknown WAL record type {record_type}")
+
+    def close(self) -> None:
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
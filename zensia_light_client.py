@@ -0,0 +1,169 @@
+# Zensia Light Client Implementation
+# Header-only chain sync with Merkle-proof transaction verification
+
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Optional
+from zensia_core_implementation import Hash, Address
+from zensia_blockchain import BlockHeader, verify_merkle_proof
+
+# height, previous_hash, merkle_root, tx_count, timestamp, validator, signature
+HEADER_FORMAT = struct.Struct(">Q32s32sQQ20s32s")
+HEADER_SIZE = HEADER_FORMAT.size
+
+def pack_header(header: BlockHeader) -> bytes:
+    """Encode a header as a fixed-width record"""
+    return HEADER_FORMAT.pack(header.height, header.previous_hash, header.merkle_root,
+                              header.tx_count, header.timestamp, header.validator, header.signature or b'')
+
+def unpack_header(record: bytes) -> BlockHeader:
+    """Decode a fixed-width header record"""
+    height, previous_hash, root, tx_count, timestamp, validator, signature = HEADER_FORMAT.unpack(record)
+    return BlockHeader(height, Hash(previous_hash), Hash(root), tx_count, timestamp,
+                       Address(validator), signature if any(signature) else None)
+
+class HeaderStore:
+    """Append-only array of fixed-width header records, in memory or memory-mapped from a file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._buffer = bytearray()
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._count = 0
+        if path is not None:
+            self._file = open(path, "a+b")
+            size = os.path.getsize(path)
+            if size % HEADER_SIZE:
+                raise ValueError(f"Header file {path} is truncated")
+            self._count = size // HEADER_SIZE
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _view(self):
+        if self._file is None:
+            return self._buffer
+        if self._map is None or len(self._map) != self._count * HEADER_SIZE:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def record(self, index: int) -> bytes:
+        """Raw record at index"""
+        if not 0 <= index < self._count:
+            raise IndexError(f"Header index {index} out of range")
+        offset = index * HEADER_SIZE
+        return bytes(self._view()[offset:offset + HEADER_SIZE])
+
+    def extend(self, records: bytes) -> None:
+        """Append one or more packed records"""
+        if self._file is None:
+            self._buffer += records
+        else:
+            self._file.write(records)
+            self._file.flush()
+        self._count += len(records) // HEADER_SIZE
+
+    def nbytes(self) -> int:
+        """Size of the stored header array"""
+        return self._count * HEADER_SIZE
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class LightClient:
+    """
+    Follows the chain by headers only
+
+    Headers are checked for height continuity, previous-hash linkage and
+    validator signatures one batch at a time; a batch is either appended
+    whole or rejected whole. Transactions are verified against stored
+    Merkle roots using proofs served by a full node (Block.merkle_proof).
+    """
+
+    def __init__(self, validator_keys: Dict[Address, bytes], path: Optional[str] = None,
+                 trusted_hash: Optional[Hash] = None):
+        """
+        Args:
+            validator_keys: Key used to verify each validator's block signatures
+            path: Optional file for a persistent, memory-mapped header chain
+            trusted_hash: previous_hash the first header must link to, if known
+        """
+        self.validator_keys = validator_keys
+        self.headers = HeaderStore(path)
+        self.trusted_hash = trusted_hash
+        self._tip_hash: Optional[Hash] = None
+        if len(self.headers):
+            self._tip_hash = self.header(self.height).block_hash
+
+    @property
+    def height(self) -> int:
+        """Height of the last synced header (0 before any header)"""
+        return len(self.headers)
+
+    @property
+    def last_block_hash(self) -> Optional[Hash]:
+        return self._tip_hash
+
+    def header(self, height: int) -> BlockHeader:
+        """Return the stored header at a height"""
+        return unpack_header(self.headers.record(height - 1))
+
+    def iter_headers(self) -> Iterator[BlockHeader]:
+        for height in range(1, self.height + 1):
+            yield self.header(height)
+
+    def sync_headers(self, headers: List[BlockHeader]) -> None:
+        """
+        Validate and append a batch of consecutive headers
+
+        Raises:
+            ValueError: If any header in the batch fails validation
+        """
+        expected_height = self.height + 1
+        previous_hash = self._tip_hash if self._tip_hash is not None else self.trusted_hash
+        records = []
+
+        # Linkage pass: each header's hash is computed once and reused as the next link
+        for header in headers:
+            if header.height != expected_height:
+                raise ValueError(f"Invalid block height: expected {expected_height}, got {header.height}")
+            if previous_hash is not None and header.previous_hash != previous_hash:
+                raise ValueError(f"Header {header.height} doesn't link to previous hash")
+            previous_hash = header.block_hash
+            expected_height += 1
+
+        # Signature pass
+        for header in headers:
+            key = self.validator_keys.get(header.validator)
+            if key is None or not header.verify_signature(key):
+                raise ValueError(f"Header {header.height} has an invalid validator signature")
+            records.append(pack_header(header))
+
+        self.headers.extend(b''.join(records))
+        if headers:
+            self._tip_hash = previous_hash
+
+    def verify_transaction(self, height: int, tx_hash: Hash, index: int, proof: List[Hash]) -> bool:
+        """
+        Check that a transaction is included in the block at height
+
+        The proof must have exactly the shape of a tree with the header's
+        committed transaction count, so out-of-range indexes and inner
+        nodes presented as transactions are rejected.
+        """
+        if not 1 <= height <= self.height:
+            return False
+        header = self.header(height)
+        return verify_merkle_proof(tx_hash, index, proof, header.merkle_root, header.tx_count)
+
+    def close(self) -> None:
+        self.headers.close()
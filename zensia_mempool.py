@@ -0,0 +1,193 @@
+# Zensia Transaction Pool Implementation
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple, Union
+from zensia_blockchain import Block, BlockchainState, REJECT_INSUFFICIENT_FUNDS, REJECT_INVALID_NONCE
+from zensia_metrics import metrics
+from zensia_transactions import Transaction
+from zensia_privacy import ConfidentialTransaction
+
+AnyTransaction = Union[Transaction, ConfidentialTransaction]
+
+def transaction_id(tx: AnyTransaction) -> bytes:
+    """Identifier used to deduplicate transactions in the pool"""
+    if isinstance(tx, Transaction):
+        return bytes(tx.tx_hash)
+    return tx.verification_digest()
+
+class TransactionPool:
+    """Pending transactions admitted against the current blockchain state"""
+
+    def __init__(self, state: BlockchainState):
+        self.state = state
+        self.transactions: OrderedDict = OrderedDict()  # transaction_id -> tx
+        self.pending_nullifiers: Set[bytes] = set()
+        self.pending_nonces: Dict[str, int] = {}  # sender -> next nonce expected by the pool
+        self.sender_nonces: Dict[str, Dict[int, bytes]] = {}  # sender -> nonce -> pending transaction_id
+        self.pending_spent: Dict[str, int] = {}  # sender -> total amount of pending transfers
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def add(self, tx: AnyTransaction) -> bool:
+        """Admit a transaction if it is valid and not already pending"""
+        tx_id = transaction_id(tx)
+        with self._lock:
+            if tx_id in self.transactions:
+                return False
+            if isinstance(tx, ConfidentialTransaction):
+                if any(n in self.pending_nullifiers for n in tx.nullifiers):
+                    return False  # Conflicts with a pending spend
+
+        if isinstance(tx, Transaction):
+            return self._add_transfer(tx_id, tx)
+
+        # Proof results land in the state's verification cache, so block
+        # building and block import reuse them
+        if not self.state.validate_transaction(tx):
+            return False
+
+        with self._lock:
+            if tx_id in self.transactions:
+                return False
+            if any(n in self.pending_nullifiers for n in tx.nullifiers):
+                return False
+            self.pending_nullifiers.update(tx.nullifiers)
+            self.transactions[tx_id] = tx
+        return True
+
+    def _sender(self, key: str) -> Tuple[int, int]:
+        """(balance, nonce) of a sender, without creating an account in the state"""
+        account = self.state.accounts.get(key)
+        if account is None:
+            return 0, 0
+        return account.balance, account.nonce
+
+    @staticmethod
+    def _check_transfer(tx: Transaction, expected_nonce: int, available: int) -> Optional[str]:
+        """
+        Check a transfer against the nonce and balance left by pending transfers
+
+        Rejections are counted by reason like BlockchainState.check_and_record,
+        whose state-only nonce check doesn't allow transfers queued behind others.
+        """
+        if available < tx.amount:
+            reason = REJECT_INSUFFICIENT_FUNDS
+        elif tx.nonce != expected_nonce:
+            reason = REJECT_INVALID_NONCE
+        else:
+            return None
+        metrics.inc("rejected_transactions_total", reason=reason)
+        return reason
+
+    def _add_transfer(self, tx_id: bytes, tx: Transaction) -> bool:
+        """Admit a transfer whose nonce follows, and that is affordable after, the sender's pending transfers"""
+        with self._lock:
+            if tx_id in self.transactions:
+                return False
+            key = tx.sender.to_hex()
+            if tx.nonce in self.sender_nonces.get(key, ()):
+                # Another pending transfer already uses this nonce
+                metrics.inc("rejected_transactions_total", reason=REJECT_INVALID_NONCE)
+                return False
+            balance, nonce = self._sender(key)
+            expected = max(self.pending_nonces.get(key, 0), nonce)
+            if self._check_transfer(tx, expected, balance - self.pending_spent.get(key, 0)) is not None:
+                return False
+            self.pending_nonces[key] = expected + 1
+            self.pending_spent[key] = self.pending_spent.get(key, 0) + tx.amount
+            self.sender_nonces.setdefault(key, {})[tx.nonce] = tx_id
+            self.transactions[tx_id] = tx
+        return True
+
+    def select(self, max_count: int) -> List[AnyTransaction]:
+        """
+        Pick up to max_count pending transactions that are still valid, in arrival order
+
+        Transactions that can't be included are evicted from the pool:
+        transfers whose nonce was already used or that the sender can't
+        afford when their turn comes (with any later transfers of that
+        sender), and confidential spends whose nullifiers are now spent or
+        whose proof fails.
+        """
+        with self._lock:
+            candidates = list(self.transactions.values())
+
+        selected = []
+        stale = []
+        nonces: Dict[str, int] = {}  # sender -> next nonce after the selected transfers
+        spent: Dict[str, int] = {}  # sender -> amount spent by the selected transfers
+        for tx in candidates:
+            if len(selected) >= max_count:
+                break
+            if isinstance(tx, Transaction):
+                key = tx.sender.to_hex()
+                balance, nonce = self._sender(key)
+                if tx.nonce < nonce:
+                    metrics.inc("rejected_transactions_total", reason=REJECT_INVALID_NONCE)
+                    stale.append(tx)
+                    continue
+                expected = nonces.get(key, nonce)
+                if tx.nonce > expected:
+                    continue  # Waiting on an earlier transfer from the same sender
+                if self._check_transfer(tx, expected, balance - spent.get(key, 0)) is not None:
+                    stale.append(tx)
+                    continue
+                nonces[key] = tx.nonce + 1
+                spent[key] = spent.get(key, 0) + tx.amount
+                selected.append(tx)
+            elif self.state.validate_transaction(tx):
+                selected.append(tx)
+            else:
+                stale.append(tx)
+
+        for tx in stale:
+            self.remove(tx)
+        return selected
+
+    def _resync_sender(self, key: str) -> None:
+        """
+        Recompute a sender's expected nonce from its remaining pending transfers
+
+        Call with the lock held. Transfers the state has overtaken, and any
+        left behind a gap in the nonce sequence, are evicted so the sender's
+        next transfer can be admitted.
+        """
+        nonces = self.sender_nonces.get(key, {})
+        expected = self._sender(key)[1]
+        spent = 0
+        for nonce in sorted(nonces):
+            if nonce == expected:
+                expected += 1
+                spent += self.transactions[nonces[nonce]].amount
+                continue
+            self.transactions.pop(nonces.pop(nonce), None)
+        if nonces:
+            self.pending_nonces[key] = expected
+            self.pending_spent[key] = spent
+        else:
+            self.pending_nonces.pop(key, None)
+            self.pending_spent.pop(key, None)
+            self.sender_nonces.pop(key, None)
+
+    def remove(self, tx: AnyTransaction) -> None:
+        """Drop a transaction from the pool"""
+        with self._lock:
+            tx_id = transaction_id(tx)
+            if self.transactions.pop(tx_id, None) is None:
+                return
+            if isinstance(tx, ConfidentialTransaction):
+                self.pending_nullifiers.difference_update(tx.nullifiers)
+            else:
+                key = tx.sender.to_hex()
+                nonces = self.sender_nonces.get(key, {})
+                if nonces.get(tx.nonce) == tx_id:
+                    del nonces[tx.nonce]
+                self._resync_sender(key)
+
+    def remove_block(self, block: Block) -> None:
+        """Drop every transaction included in an imported block, and any it made stale"""
+        for tx in block.transactions:
+            self.remove(tx)
@@ -0,0 +1,226 @@
+# Zensia Metrics Implementation
+# Low-overhead timers, counters and gauges with Prometheus text export
+
+import bisect
+import cProfile
+import os
+import pstats
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds (1us .. 10s)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0, 10.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket histogram of observed durations"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class _NullTimer:
+    """Timer used while metrics are disabled; does nothing"""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+_NULL_TIMER = _NullTimer()
+
+class _StageTimer:
+    """Records the monotonic duration of a block of code into a stage histogram"""
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+
+class _BlockImportProfiler:
+    """Runs one sampled block import under cProfile"""
+
+    def __init__(self, registry: 'MetricsRegistry'):
+        self.registry = registry
+        self.profile = cProfile.Profile()
+
+    def __enter__(self) -> None:
+        self.profile.enable()
+
+    def __exit__(self, *exc) -> None:
+        self.profile.disable()
+        self.registry._add_profile(self.profile)
+
+class MetricsRegistry:
+    """
+    Process-wide metrics for block import and consensus
+
+    Disabled by default: every hook checks a single attribute and returns,
+    so instrumented code pays almost nothing until enable() is called.
+    """
+
+    def __init__(self, namespace: str = "zensia"):
+        self.namespace = namespace
+        self.enabled = False
+        self.histograms: Dict[str, Histogram] = {}  # stage -> durations
+        self.counters: Dict[Tuple[str, Labels], int] = {}
+        self.gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        # Sampling profiler around block import
+        self.profile_every = 0
+        self.profile_stats: Optional[pstats.Stats] = None
+        self._imports_seen = 0
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop every recorded value"""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.profile_stats = None
+            self._imports_seen = 0
+
+    def time(self, stage: str):
+        """Context manager timing a stage (no-op while disabled)"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record a stage duration"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, amount: int = 1, **labels: str) -> None:
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value"""
+        if not self.enabled:
+            return
+        self.gauges[name] = value
+
+    def enable_profiling(self, sample_every: int = 100) -> None:
+        """Profile one in every sample_every block imports with cProfile (0 disables)"""
+        self.profile_every = sample_every
+
+    def profile_block_import(self):
+        """Context manager that profiles a sampled subset of block imports"""
+        if not self.enabled or not self.profile_every:
+            return _NULL_TIMER
+        with self._lock:
+            self._imports_seen += 1
+            sampled = self._imports_seen % self.profile_every == 0
+        return _BlockImportProfiler(self) if sampled else _NULL_TIMER
+
+    def _add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            if self.profile_stats is None:
+                self.profile_stats = pstats.Stats(profile)
+            else:
+                self.profile_stats.add(profile)
+
+    def dump_profile(self, path: str) -> None:
+        """Write accumulated block import profiles in pstats format"""
+        if self.profile_stats is not None:
+            self.profile_stats.dump_stats(path)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        ns = self.namespace
+        lines: List[str] = []
+        with self._lock:
+            if self.histograms:
+                name = f"{ns}_stage_duration_seconds"
+                lines.append(f"# HELP {name} Time spent per hot-path stage")
+                lines.append(f"# TYPE {name} histogram")
+                for stage, h in sorted(self.histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                    lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum!r}')
+                    lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+
+            typed = set()
+            for (counter, labels), value in sorted(self.counters.items()):
+                name = f"{ns}_{counter}"
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+            for gauge, value in sorted(self.gauges.items()):
+                name = f"{ns}_{gauge}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Write the Prometheus text format to a file (e.g. for node_exporter's textfile collector)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics on a local port from a daemon thread; call shutdown() to stop"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+# Shared registry used by the blockchain and consensus modules
+metrics = MetricsRegistry()
@@ -0,0 +1,118 @@
+# Zensia Note Cipher Implementation
+# Whole-buffer encryption and batch trial decryption of confidential notes
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+KEY_SIZE = 32  # SHA-256 digest size
+BLINDING_SIZE = 32
+TAG_SIZE = 8  # Check tag prepended to every encrypted note
+
+@dataclass
+class DecryptedNote:
+    """A note that was successfully decrypted by one of the scanned keys"""
+    note_index: int
+    key_index: int
+    value: int
+    blinding_factor: bytes
+
+def derive_note_key(recipient_key: bytes) -> bytes:
+    """Derive the symmetric note key from a recipient key"""
+    return hashlib.sha256(recipient_key).digest()
+
+def expand_keystream(key: bytes, length: int) -> bytes:
+    """Expand a 32-byte key into a keystream of the requested length"""
+    # Counter mode over SHA-256: block i = H(key || i)
+    blocks = (length + KEY_SIZE - 1) // KEY_SIZE
+    return b''.join(
+        hashlib.sha256(key + i.to_bytes(4, 'big')).digest()
+        for i in range(blocks)
+    )[:length]
+
+def _xor(data: bytes, keystream: bytes) -> bytes:
+    """XOR two equal-length buffers in a single big-integer operation"""
+    length = len(data)
+    mixed = int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')
+    return mixed.to_bytes(length, 'big')
+
+def _tag(key: bytes, plaintext: bytes) -> bytes:
+    """Compute the check tag used to recognise a successful decryption"""
+    return hashlib.sha256(key + plaintext).digest()[:TAG_SIZE]
+
+def _parse_plaintext(plaintext: bytes) -> Optional[Tuple[int, bytes]]:
+    """Split a note plaintext into (value, blinding_factor)"""
+    value_bytes = plaintext[:-BLINDING_SIZE]
+    if not value_bytes.isdigit():
+        return None
+    return int(value_bytes), plaintext[-BLINDING_SIZE:]
+
+def encrypt_note(value: int, blinding_factor: bytes, recipient_key: bytes) -> bytes:
+    """Encrypt a note for the recipient"""
+    if value < 0:
+        raise ValueError(f"Note value must be non-negative, got {value}")
+    if len(blinding_factor) != BLINDING_SIZE:
+        raise ValueError(f"Blinding factor must be {BLINDING_SIZE} bytes, got {len(blinding_factor)}")
+    # XOR-based encryption (for demonstration only, not secure)
+    plaintext = str(value).encode() + blinding_factor
+    key = derive_note_key(recipient_key)
+    ciphertext = _xor(plaintext, expand_keystream(key, len(plaintext)))
+    return _tag(key, plaintext) + ciphertext
+
+def decrypt_note(encrypted_note: bytes, recipient_key: bytes) -> Optional[Tuple[int, bytes]]:
+    """
+    Decrypt a note encrypted with encrypt_note
+
+    Returns:
+        (value, blinding_factor) if the note belongs to the key, otherwise None
+    """
+    if len(encrypted_note) <= TAG_SIZE + BLINDING_SIZE:
+        return None
+    key = derive_note_key(recipient_key)
+    tag, ciphertext = encrypted_note[:TAG_SIZE], encrypted_note[TAG_SIZE:]
+    plaintext = _xor(ciphertext, expand_keystream(key, len(ciphertext)))
+    if _tag(key, plaintext) != tag:
+        return None
+    return _parse_plaintext(plaintext)
+
+def try_decrypt_many(notes: Sequence[bytes], keys: Sequence[bytes]) -> List[DecryptedNote]:
+    """
+    Trial-decrypt every note against every key
+
+    Note keys are derived once per call and keystreams are cached per
+    (key, length) pair as integers, so each attempt costs a single XOR
+    and one tag hash.
+
+    Args:
+        notes: Encrypted notes to scan
+        keys: Recipient keys to try against each note
+
+    Returns:
+        List of DecryptedNote for every (note, key) pair that matched
+    """
+    note_keys = [derive_note_key(k) for k in keys]
+    keystreams: Dict[Tuple[int, int], int] = {}  # (key_index, length) -> keystream
+    found: List[DecryptedNote] = []
+
+    for note_index, encrypted_note in enumerate(notes):
+        length = len(encrypted_note) - TAG_SIZE
+        if length <= BLINDING_SIZE:
+            continue
+        tag = encrypted_note[:TAG_SIZE]
+        ciphertext = int.from_bytes(encrypted_note[TAG_SIZE:], 'big')
+
+        for key_index, key in enumerate(note_keys):
+            stream = keystreams.get((key_index, length))
+            if stream is None:
+                stream = int.from_bytes(expand_keystream(key, length), 'big')
+                keystreams[(key_index, length)] = stream
+            plaintext = (ciphertext ^ stream).to_bytes(length, 'big')
+            if _tag(key, plaintext) != tag:
+                continue
+            parsed = _parse_plaintext(plaintext)
+            if parsed is None:
+                continue
+            found.append(DecryptedNote(note_index, key_index, parsed[0], parsed[1]))
+            break  # A note belongs to at most one recipient
+
+    return found
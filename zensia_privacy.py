@@ -2,9 +2,14 @@
 
 import hashlib
 import secrets
-import json
-from typing import List, Tuple, Optional, Dict, Set
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Iterable, Iterator, List, Tuple, Optional, Dict, Set
 from zensia_core_implementation import Address, Hash
+from zensia_note_cipher import encrypt_note, decrypt_note
 
 class StealthAddress:
     """A one-time stealth address for enhanced privacy"""
@@ -35,6 +40,16 @@ class StealthAddress:
         ephemeral_pubkey = hashlib.sha256(shared_secret + self.spend_pubkey).digest()
         return Address.from_public_key(ephemeral_pubkey)
 
+def _encode_proof_input(*groups: List[bytes]) -> bytes:
+    """Length-prefixed binary encoding of lists of byte strings"""
+    parts = []
+    for group in groups:
+        parts.append(len(group).to_bytes(4, 'big'))
+        for item in group:
+            parts.append(len(item).to_bytes(4, 'big'))
+            parts.append(item)
+    return b''.join(parts)
+
 class ConfidentialTransaction:
     """Privacy-preserving transaction using zero-knowledge proofs"""
     
@@ -62,17 +77,18 @@ class ConfidentialTransaction:
         """Encrypt a note for the recipient"""
         # Simple symmetric encryption using recipient's key
         # Real implementation would use proper encryption
-        plaintext = str(value).encode() + blinding_factor
-        key = hashlib.sha256(recipient_key).digest()
-        # XOR-based encryption (for demonstration only, not secure)
-        ciphertext = bytearray(len(plaintext))
-        for i in range(len(plaintext)):
-            ciphertext[i] = plaintext[i] ^ key[i % len(key)]
-        return bytes(ciphertext)
+        return encrypt_note(value, blinding_factor, recipient_key)
+    
+    @staticmethod
+    def _decrypt_note(encrypted_note: bytes, recipient_key: bytes) -> Optional[Tuple[int, bytes]]:
+        """Decrypt a note, returning (value, blinding_factor) or None if not ours"""
+        return decrypt_note(encrypted_note, recipient_key)
     
     def create(self, inputs: List[Tuple[bytes, int, bytes]], 
                outputs: List[Tuple[Address, int]], 
-               sender_private_key: bytes) -> None:
+               sender_private_key: bytes,
+               timings: Optional[Dict[str, float]] = None,
+               blinding_factors: Optional[List[bytes]] = None) -> None:
         """
         Create a confidential transaction
         
@@ -80,16 +96,24 @@ class ConfidentialTransaction:
             inputs: List of (note, value, blinding_factor) for inputs
             outputs: List of (recipient_address, value) for outputs
             sender_private_key: Private key of the sender
+            timings: Optional dict receiving seconds spent per stage
+            blinding_factors: Optional blinding factor per output (random if omitted)
         """
+        start = time.perf_counter()
+        
         # Process inputs (existing notes to spend)
         for note, value, blinding in inputs:
             nullifier = self._compute_nullifier(note, sender_private_key)
             self.nullifiers.append(nullifier)
+        nullified = time.perf_counter()
         
         # Create output commitments
-        for recipient, value in outputs:
+        for i, (recipient, value) in enumerate(outputs):
             # Generate random blinding factor for each output
-            blinding_factor = secrets.token_bytes(32)
+            if blinding_factors is not None:
+                blinding_factor = blinding_factors[i]
+            else:
+                blinding_factor = secrets.token_bytes(32)
             
             # Create commitment
             commitment = self._create_commitment(value, recipient, blinding_factor)
@@ -100,17 +124,21 @@ class ConfidentialTransaction:
             recipient_key = bytes(recipient)  # Simplified for demonstration
             encrypted_note = self._encrypt_note(value, blinding_factor, recipient_key)
             self.encrypted_notes.append(encrypted_note)
+        committed = time.perf_counter()
         
         # Generate zero-knowledge proof
         # In a real implementation, this would use a proper zk-SNARK library
         # For demonstration, we're just simulating a proof
-        mock_proof_data = json.dumps({
-            "nullifiers": [n.hex() for n in self.nullifiers],
-            "commitments": [c.hex() for c in self.commitments],
-            # Additional data needed for the proof would go here
-        }).encode()
+        # Additional data needed for the proof would be appended to the input here
+        mock_proof_data = _encode_proof_input(self.nullifiers, self.commitments)
         
         self.proof = hashlib.sha256(mock_proof_data + sender_private_key).digest()
+        
+        if timings is not None:
+            proved = time.perf_counter()
+            timings["nullifiers"] = nullified - start
+            timings["outputs"] = committed - nullified
+            timings["proof"] = proved - committed
     
     def verify(self) -> bool:
         """
@@ -121,4 +149,153 @@ class ConfidentialTransaction:
         """
         # In a real implementation, this would verify the zk-SNARK proof
         # For demonstration, we're just returning True
-        return self.proof is not None
\ No newline at end of file
+        return self.proof is not None
+    
+    def to_json(self) -> Dict:
+        """Convert transaction to JSON-serializable dictionary"""
+        return {
+            "type": "confidential",
+            "nullifiers": [n.hex() for n in self.nullifiers],
+            "commitments": [c.hex() for c in self.commitments],
+            "encrypted_notes": [n.hex() for n in self.encrypted_notes],
+            "proof": self.proof.hex() if self.proof else None
+        }
+    
+    @classmethod
+    def from_json(cls, data: Dict) -> 'ConfidentialTransaction':
+        """Rebuild a transaction from its JSON dictionary"""
+        tx = cls()
+        tx.nullifiers = [bytes.fromhex(n) for n in data["nullifiers"]]
+        tx.commitments = [bytes.fromhex(c) for c in data["commitments"]]
+        tx.encrypted_notes = [bytes.fromhex(n) for n in data["encrypted_notes"]]
+        tx.proof = bytes.fromhex(data["proof"]) if data["proof"] else None
+        return tx
+    
+    def verification_digest(self) -> bytes:
+        """Digest of everything the proof verification depends on"""
+        data = _encode_proof_input(self.nullifiers, self.commitments)
+        return hashlib.sha256(data + (self.proof or b'')).digest()
+
+class ProofVerificationCache:
+    """Bounded, thread-safe LRU cache of ConfidentialTransaction proof results"""
+    
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict = OrderedDict()  # digest -> bool
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._results)
+    
+    def verify(self, tx: ConfidentialTransaction) -> bool:
+        """Return the proof verification result for tx, verifying only on a miss"""
+        digest = tx.verification_digest()
+        with self._lock:
+            result = self._results.get(digest)
+            if result is not None:
+                self._results.move_to_end(digest)
+                self.hits += 1
+                return result
+            self.misses += 1
+        
+        # Verify outside the lock so concurrent misses don't serialize
+        result = tx.verify()
+        with self._lock:
+            self._results[digest] = result
+            self._results.move_to_end(digest)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+        return result
+    
+    def invalidate(self, tx: ConfidentialTransaction) -> None:
+        """Drop the cached result for a transaction"""
+        with self._lock:
+            self._results.pop(tx.verification_digest(), None)
+    
+    def clear(self) -> None:
+        """Drop all cached results and reset counters"""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+@dataclass
+class ConfidentialSpec:
+    """Arguments for building one confidential transaction"""
+    inputs: List[Tuple[bytes, int, bytes]]
+    outputs: List[Tuple[Address, int]]
+    sender_private_key: bytes
+
+@dataclass
+class BuildStats:
+    """Progress and accumulated per-stage timing of a batch build"""
+    completed: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    
+    def record(self, timings: Dict[str, float]) -> None:
+        self.completed += 1
+        for stage, seconds in timings.items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+def _build_chunk(specs: List[ConfidentialSpec]) -> List[Tuple[ConfidentialTransaction, Dict[str, float]]]:
+    """Worker entry point: build a chunk of confidential transactions"""
+    results = []
+    for spec in specs:
+        timings: Dict[str, float] = {}
+        tx = ConfidentialTransaction()
+        tx.create(spec.inputs, spec.outputs, spec.sender_private_key, timings)
+        results.append((tx, timings))
+    return results
+
+def build_many(specs: Iterable[ConfidentialSpec], executor: Optional[Executor] = None,
+               chunk_size: int = 64, max_pending: int = 16,
+               stats: Optional[BuildStats] = None,
+               progress: Optional[Callable[[int], None]] = None) -> Iterator[ConfidentialTransaction]:
+    """
+    Build confidential transactions, optionally fanning out to an executor
+    
+    Specs are sent to the executor in chunks and finished transactions are
+    yielded in input order as soon as every earlier chunk has completed.
+    At most max_pending chunks are in flight, so specs may be a lazy stream.
+    
+    Args:
+        specs: Transactions to build
+        executor: Executor for proof generation (e.g. a ProcessPoolExecutor); built inline if None
+        chunk_size: Number of specs handed to a worker at once
+        max_pending: Maximum chunks in flight
+        stats: Optional BuildStats updated as transactions complete
+        progress: Optional callback receiving the number of completed transactions
+    """
+    if stats is None:
+        stats = BuildStats()
+    
+    def finish(results: List[Tuple[ConfidentialTransaction, Dict[str, float]]]) -> Iterator[ConfidentialTransaction]:
+        for tx, timings in results:
+            stats.record(timings)
+            yield tx
+        if progress is not None:
+            progress(stats.completed)
+    
+    pending: Deque = deque()
+    chunk: List[ConfidentialSpec] = []
+    for spec in specs:
+        chunk.append(spec)
+        if len(chunk) < chunk_size:
+            continue
+        if executor is None:
+            yield from finish(_build_chunk(chunk))
+        else:
+            pending.append(executor.submit(_build_chunk, chunk))
+            while len(pending) >= max_pending or (pending and pending[0].done()):
+                yield from finish(pending.popleft().result())
+        chunk = []
+    
+    if chunk:
+        if executor is None:
+            yield from finish(_build_chunk(chunk))
+        else:
+            pending.append(executor.submit(_build_chunk, chunk))
+    while pending:
+        yield from finish(pending.popleft().result())
@@ -0,0 +1,270 @@
+# Zensia State Snapshot Implementation
+# Chunked export/import of BlockchainState for fast node bootstrap
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from zensia_core_implementation import Hash, Address
+from zensia_blockchain import AccountState, BlockchainState, merkle_root
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+SECTION_ACCOUNTS = "accounts"
+SECTION_NULLIFIERS = "nullifiers"
+SECTION_COMMITMENTS = "commitments"
+
+# Fixed-width records per section
+ACCOUNT_FORMAT = struct.Struct(">20sqQ")  # address, balance, nonce
+SET_ENTRY_FORMAT = struct.Struct(">32s")
+RECORD_FORMATS = {
+    SECTION_ACCOUNTS: ACCOUNT_FORMAT,
+    SECTION_NULLIFIERS: SET_ENTRY_FORMAT,
+    SECTION_COMMITMENTS: SET_ENTRY_FORMAT,
+}
+
+@dataclass
+class ChunkInfo:
+    """One independently hashed chunk of a snapshot"""
+    file: str
+    section: str
+    records: int
+    hash: Hash
+
+    @property
+    def leaf(self) -> Hash:
+        """Merkle leaf committing to the chunk's section, record count and contents"""
+        return Hash.from_bytes(self.section.encode() + struct.pack(">Q", self.records) + self.hash)
+
+def _check_chunk_file(name: str) -> None:
+    """Reject chunk file names that could point outside the snapshot directory"""
+    if (not name or name in (".", "..") or os.path.basename(name) != name
+            or (os.altsep and os.altsep in name)):
+        raise ValueError(f"Invalid snapshot chunk file name {name!r}")
+
+@dataclass
+class SnapshotManifest:
+    """Index of a snapshot: state position, chunk list and their Merkle root"""
+    height: int
+    last_block_hash: Optional[Hash]
+    chunk_size: int
+    chunks: List[ChunkInfo] = field(default_factory=list)
+
+    @property
+    def root(self) -> Hash:
+        """Merkle root over (height, last block hash) and every chunk's leaf"""
+        position = Hash.from_bytes(struct.pack(">Q", self.height) + (self.last_block_hash or b''))
+        return merkle_root([position] + [c.leaf for c in self.chunks])
+
+    def to_json(self) -> Dict:
+        """Convert manifest to JSON-serializable dictionary"""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "height": self.height,
+            "last_block_hash": self.last_block_hash.to_hex() if self.last_block_hash else None,
+            "chunk_size": self.chunk_size,
+            "chunks": [{"file": c.file, "section": c.section, "records": c.records,
+                        "hash": c.hash.to_hex()} for c in self.chunks],
+            "root": self.root.to_hex()
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'SnapshotManifest':
+        """Rebuild a manifest, checking its recorded root and chunk entries"""
+        if data["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {data['version']}")
+        for c in data["chunks"]:
+            _check_chunk_file(c["file"])
+            if c["section"] not in RECORD_FORMATS:
+                raise ValueError(f"Unknown snapshot section {c['section']}")
+        manifest = cls(
+            height=data["height"],
+            last_block_hash=Hash(bytes.fromhex(data["last_block_hash"])) if data["last_block_hash"] else None,
+            chunk_size=data["chunk_size"],
+            chunks=[ChunkInfo(c["file"], c["section"], c["records"], Hash(bytes.fromhex(c["hash"])))
+                    for c in data["chunks"]]
+        )
+        if manifest.root.to_hex() != data["root"]:
+            raise ValueError("Snapshot manifest root doesn't match its chunks")
+        return manifest
+
+def _account_records(state: BlockchainState) -> Iterator[bytes]:
+    for account in state.accounts.values():
+        yield ACCOUNT_FORMAT.pack(account.address, account.balance, account.nonce)
+
+def _set_records(entries: Iterable[bytes]) -> Iterator[bytes]:
+    for entry in entries:
+        yield SET_ENTRY_FORMAT.pack(entry)
+
+def _write_chunk(path: str, data: bytes) -> Hash:
+    chunk_hash = Hash.from_bytes(data)
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return chunk_hash
+
+def export_snapshot(state: BlockchainState, directory: str, chunk_size: int = 4 * 1024 * 1024,
+                    workers: int = 4, max_pending: int = 8) -> SnapshotManifest:
+    """
+    Write the state at its current height as hashed chunks plus a manifest
+
+    Records are packed into chunks of at most chunk_size bytes on the calling
+    thread while worker threads hash and write finished chunks; at most
+    max_pending chunks are buffered at once.
+
+    The snapshot is written to a temporary sibling directory and renamed to
+    directory once complete, replacing any snapshot already there, so an
+    interrupted export never mixes old and new chunks.
+
+    Returns:
+        The manifest, whose root identifies the snapshot
+    """
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    tmp_directory = tempfile.mkdtemp(prefix=os.path.basename(directory) + ".tmp-", dir=parent)
+    try:
+        manifest = _write_snapshot(state, tmp_directory, chunk_size, workers, max_pending)
+        _replace_directory(tmp_directory, directory)
+    except BaseException:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        raise
+    return manifest
+
+def _replace_directory(source: str, target: str) -> None:
+    """Rename source to target, removing any existing target afterwards"""
+    old = None
+    if os.path.exists(target):
+        old = tempfile.mkdtemp(prefix=os.path.basename(target) + ".old-", dir=os.path.dirname(target))
+        os.rename(target, os.path.join(old, os.path.basename(target)))
+    os.rename(source, target)
+    fd = os.open(os.path.dirname(target), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    if old is not None:
+        shutil.rmtree(old)
+
+def _write_snapshot(state: BlockchainState, directory: str, chunk_size: int,
+                    workers: int, max_pending: int) -> SnapshotManifest:
+    manifest = SnapshotManifest(state.height, state.last_block_hash, chunk_size)
+    pending: Deque[Tuple[ChunkInfo, object]] = deque()
+
+    def finish_oldest() -> None:
+        info, future = pending.popleft()
+        info.hash = future.result()
+
+    with ThreadPoolExecutor(workers) as executor:
+        def submit(section: str, records: List[bytes]) -> None:
+            info = ChunkInfo(f"chunk-{len(manifest.chunks):06d}.bin", section, len(records), Hash(b''))
+            manifest.chunks.append(info)
+            future = executor.submit(_write_chunk, os.path.join(directory, info.file), b''.join(records))
+            pending.append((info, future))
+            while len(pending) >= max_pending:
+                finish_oldest()
+
+        sections = (
+            (SECTION_ACCOUNTS, _account_records(state)),
+            (SECTION_NULLIFIERS, _set_records(state.nullifier_set)),
+            (SECTION_COMMITMENTS, _set_records(state.commitment_set)),
+        )
+        for section, records in sections:
+            per_chunk = max(1, chunk_size // RECORD_FORMATS[section].size)
+            batch: List[bytes] = []
+            for record in records:
+                batch.append(record)
+                if len(batch) == per_chunk:
+                    submit(section, batch)
+                    batch = []
+            if batch:
+                submit(section, batch)
+        while pending:
+            finish_oldest()
+
+    # Manifest last, atomically: a snapshot without one is incomplete
+    tmp_path = os.path.join(directory, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest.to_json(), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+    return manifest
+
+def load_manifest(directory: str, expected_root: Optional[Hash] = None) -> SnapshotManifest:
+    """Read a snapshot manifest, optionally requiring a trusted root"""
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = SnapshotManifest.from_json(json.load(f))
+    if expected_root is not None and manifest.root != expected_root:
+        raise ValueError("Snapshot root doesn't match the trusted root")
+    return manifest
+
+def _read_chunk(directory: str, info: ChunkInfo) -> bytes:
+    """Read and verify one chunk"""
+    with open(os.path.join(directory, info.file), "rb") as f:
+        data = f.read()
+    record_size = RECORD_FORMATS[info.section].size
+    if len(data) != info.records * record_size or Hash.from_bytes(data) != info.hash:
+        raise ValueError(f"Snapshot chunk {info.file} failed verification")
+    return data
+
+def iter_chunks(directory: str, manifest: SnapshotManifest, workers: int = 4,
+                max_pending: int = 8) -> Iterator[Tuple[ChunkInfo, bytes]]:
+    """Yield verified chunks in manifest order, reading and hashing ahead in worker threads"""
+    with ThreadPoolExecutor(workers) as executor:
+        pending: Deque = deque()
+        for info in manifest.chunks:
+            pending.append((info, executor.submit(_read_chunk, directory, info)))
+            if len(pending) >= max_pending:
+                chunk_info, future = pending.popleft()
+                yield chunk_info, future.result()
+        while pending:
+            chunk_info, future = pending.popleft()
+            yield chunk_info, future.result()
+
+def verify_snapshot(directory: str, expected_root: Optional[Hash] = None, workers: int = 4) -> SnapshotManifest:
+    """Check every chunk of a snapshot against its manifest"""
+    manifest = load_manifest(directory, expected_root)
+    for _ in iter_chunks(directory, manifest, workers):
+        pass
+    return manifest
+
+def import_snapshot(directory: str, state: Optional[BlockchainState] = None,
+                    expected_root: Optional[Hash] = None, workers: int = 4) -> BlockchainState:
+    """
+    Restore a BlockchainState from a snapshot
+
+    Chunks are verified ahead in worker threads and applied one at a time,
+    so only a bounded number of chunks are held in memory. Every chunk is
+    verified before its records touch the state.
+
+    Raises:
+        ValueError: If the manifest or any chunk fails verification; chunks
+            applied before the failure remain, so the state should be discarded
+    """
+    manifest = load_manifest(directory, expected_root)
+    if state is None:
+        state = BlockchainState()
+    accounts = state.accounts
+
+    for info, data in iter_chunks(directory, manifest, workers):
+        if info.section == SECTION_ACCOUNTS:
+            for address, balance, nonce in ACCOUNT_FORMAT.iter_unpack(data):
+                accounts[address.hex()] = AccountState(Address(address), balance, nonce)
+        elif info.section == SECTION_NULLIFIERS:
+            state.nullifier_set.update(entry for (entry,) in SET_ENTRY_FORMAT.iter_unpack(data))
+        elif info.section == SECTION_COMMITMENTS:
+            state.commitment_set.update(entry for (entry,) in SET_ENTRY_FORMAT.iter_unpack(data))
+        else:
+            raise ValueError(f"Unknown snapshot section {info.section}")
+
+    state.height = manifest.height
+    state.last_block_hash = manifest.last_block_hash
+    return state
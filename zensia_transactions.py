@@ -19,9 +19,11 @@ class Transaction:
     signature: Optional[bytes] = None
     
     @classmethod
-    def create(cls, sender: Address, recipient: Address, amount: int, nonce: int) -> 'Transaction':
-        """Create a new unsigned transaction"""
-        timestamp = int(time.time())
+    def create(cls, sender: Address, recipient: Address, amount: int, nonce: int,
+               timestamp: Optional[int] = None) -> 'Transaction':
+        """Create a new unsigned transaction (timestamped now unless given)"""
+        if timestamp is None:
+            timestamp = int(time.time())
         # Calculate transaction hash
         tx_data = f"{sender}{recipient}{amount}{nonce}{timestamp}".encode('utf-8')
         tx_hash = Hash.from_bytes(tx_data)
@@ -61,4 +63,17 @@ class Transaction:
             "nonce": self.nonce,
             "timestamp": self.timestamp,
             "signature": base64.b64encode(self.signature).decode('utf-8') if self.signature else None
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def from_json(cls, data: Dict) -> 'Transaction':
+        """Rebuild a transaction from its JSON dictionary"""
+        return cls(
+            tx_hash=Hash(bytes.fromhex(data["tx_hash"])),
+            sender=Address.from_string(data["sender"]),
+            recipient=Address.from_string(data["recipient"]),
+            amount=data["amount"],
+            nonce=data["nonce"],
+            timestamp=data["timestamp"],
+            signature=base64.b64decode(data["signature"]) if data["signature"] else None
+        )
\ No newline at end of file
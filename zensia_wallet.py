@@ -0,0 +1,267 @@
+# Zensia Wallet Scanner Implementation
+# Incremental discovery of incoming confidential notes
+
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+from zensia_blockchain import Block
+from zensia_privacy import ConfidentialTransaction
+from zensia_note_cipher import try_decrypt_many
+
+# (height, tx_index, output_index) locating a note inside the chain
+NoteLocation = Tuple[int, int, int]
+
+NOTES_SUFFIX = ".notes"
+
+@dataclass
+class FoundNote:
+    """An incoming note discovered by the scanner"""
+    height: int
+    tx_index: int
+    output_index: int
+    viewing_key: bytes
+    value: int
+    blinding_factor: bytes
+    commitment: bytes
+
+    def to_json(self) -> Dict:
+        """Convert note to JSON-serializable dictionary"""
+        return {
+            "height": self.height,
+            "tx_index": self.tx_index,
+            "output_index": self.output_index,
+            "viewing_key": self.viewing_key.hex(),
+            "value": self.value,
+            "blinding_factor": self.blinding_factor.hex(),
+            "commitment": self.commitment.hex()
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'FoundNote':
+        """Rebuild a note from its JSON dictionary"""
+        return cls(
+            height=data["height"],
+            tx_index=data["tx_index"],
+            output_index=data["output_index"],
+            viewing_key=bytes.fromhex(data["viewing_key"]),
+            value=data["value"],
+            blinding_factor=bytes.fromhex(data["blinding_factor"]),
+            commitment=bytes.fromhex(data["commitment"])
+        )
+
+@dataclass
+class ScanCheckpoint:
+    """
+    Scan progress per viewing key plus every note found so far
+
+    On disk this is a small height record at path, rewritten atomically,
+    and an append-only NDJSON log of found notes at path + NOTES_SUFFIX.
+    Notes are appended before the height record is replaced, so after a
+    crash the log may hold notes past the recorded heights; those are
+    dropped on load and found again by the rescan.
+    """
+    key_heights: Dict[str, int] = field(default_factory=dict)  # viewing key hex -> last scanned height
+    notes: List[FoundNote] = field(default_factory=list)
+
+    def height_for(self, viewing_key: bytes) -> int:
+        """Last height scanned for a key (0 if it has never been scanned)"""
+        return self.key_heights.get(viewing_key.hex(), 0)
+
+    def save(self, path: str, new_notes: List[FoundNote]) -> None:
+        """Append newly found notes to the log, then atomically replace the height record"""
+        if new_notes:
+            with open(path + NOTES_SUFFIX, "a") as f:
+                for note in new_notes:
+                    f.write(json.dumps(note.to_json()) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key_heights": self.key_heights}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ScanCheckpoint':
+        """Load a checkpoint, or start from genesis if none exists"""
+        checkpoint = cls()
+        if not os.path.exists(path):
+            return checkpoint
+        with open(path) as f:
+            checkpoint.key_heights = json.load(f)["key_heights"]
+        if os.path.exists(path + NOTES_SUFFIX):
+            seen = set()
+            with open(path + NOTES_SUFFIX) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    note = FoundNote.from_json(json.loads(line))
+                    key = (note.viewing_key, note.height, note.tx_index, note.output_index)
+                    if note.height > checkpoint.height_for(note.viewing_key) or key in seen:
+                        continue
+                    seen.add(key)
+                    checkpoint.notes.append(note)
+        return checkpoint
+
+def _scan_notes(notes: List[bytes], keys: List[bytes]) -> List[Tuple[int, int, int, bytes]]:
+    """Worker entry point: trial-decrypt a batch of notes against all keys"""
+    return [(m.note_index, m.key_index, m.value, m.blinding_factor)
+            for m in try_decrypt_many(notes, keys)]
+
+class WalletScanner:
+    """
+    Scans blocks for confidential notes addressed to a set of viewing keys
+
+    Viewing keys are the recipient keys notes are encrypted to. Payments to
+    StealthAddress ephemeral addresses cannot be found this way: deriving
+    the ephemeral address needs the sender's private key, since the
+    simulated scheme has no Diffie-Hellman exchange or ephemeral public key
+    in the transaction.
+
+    Progress is tracked per key. Keys added since the last scan start from
+    genesis, so the scan resumes from the lowest height among the current
+    keys and notes already recorded for a key are not reported twice.
+    """
+
+    def __init__(self, viewing_keys: Sequence[bytes], checkpoint_path: Optional[str] = None,
+                 executor: Optional[Executor] = None, workers: Optional[int] = None,
+                 blocks_per_batch: int = 64, max_pending: Optional[int] = None,
+                 checkpoint_every: int = 16):
+        """
+        Args:
+            viewing_keys: Recipient keys to trial-decrypt with
+            checkpoint_path: File used to persist and resume scan progress
+            executor: Executor for decryption batches; a process pool is created if omitted
+            workers: Worker count of the executor (defaults to the CPU count)
+            blocks_per_batch: Number of blocks handed to a worker at once
+            max_pending: Maximum batches in flight (defaults to twice the worker count)
+            checkpoint_every: Completed batches between checkpoint writes
+        """
+        self.viewing_keys = list(viewing_keys)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = ScanCheckpoint.load(checkpoint_path) if checkpoint_path else ScanCheckpoint()
+        self.blocks_per_batch = blocks_per_batch
+        self.checkpoint_every = checkpoint_every
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.max_pending = max_pending or 2 * self.workers
+        self._unsaved: List[FoundNote] = []
+        self._batches_since_save = 0
+
+    @property
+    def height(self) -> int:
+        """Last block height fully scanned for every viewing key"""
+        return min((self.checkpoint.height_for(k) for k in self.viewing_keys), default=0)
+
+    @property
+    def notes(self) -> List[FoundNote]:
+        """All notes found so far"""
+        return self.checkpoint.notes
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the process pool if this scanner created it"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'WalletScanner':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _collect_notes(blocks: List[Block]) -> Tuple[List[bytes], List[NoteLocation], List[bytes]]:
+        """Flatten the encrypted notes of a batch of blocks"""
+        notes: List[bytes] = []
+        locations: List[NoteLocation] = []
+        commitments: List[bytes] = []
+        for block in blocks:
+            for tx_index, tx in enumerate(block.transactions):
+                if not isinstance(tx, ConfidentialTransaction):
+                    continue
+                for output_index, note in enumerate(tx.encrypted_notes):
+                    notes.append(note)
+                    locations.append((block.height, tx_index, output_index))
+                    commitments.append(tx.commitments[output_index])
+        return notes, locations, commitments
+
+    def _complete(self, last_height: int, locations: List[NoteLocation],
+                  commitments: List[bytes], future: Future) -> List[FoundNote]:
+        """Record a finished batch and advance every key's height"""
+        found = []
+        for note_index, key_index, value, blinding in future.result():
+            height, tx_index, output_index = locations[note_index]
+            viewing_key = self.viewing_keys[key_index]
+            if height <= self.checkpoint.height_for(viewing_key):
+                continue  # Already recorded by an earlier scan with this key
+            found.append(FoundNote(height, tx_index, output_index, viewing_key,
+                                   value, blinding, commitments[note_index]))
+        self.checkpoint.notes.extend(found)
+        self._unsaved.extend(found)
+        for viewing_key in self.viewing_keys:
+            key = viewing_key.hex()
+            self.checkpoint.key_heights[key] = max(self.checkpoint.key_heights.get(key, 0), last_height)
+
+        self._batches_since_save += 1
+        if self._batches_since_save >= self.checkpoint_every:
+            self.save_checkpoint()
+        return found
+
+    def save_checkpoint(self) -> None:
+        """Persist notes found since the last save and the current key heights"""
+        if self.checkpoint_path:
+            self.checkpoint.save(self.checkpoint_path, self._unsaved)
+        self._unsaved = []
+        self._batches_since_save = 0
+
+    def scan(self, blocks: Iterable[Block]) -> List[FoundNote]:
+        """
+        Scan a stream of blocks, resuming after the last checkpointed height
+
+        Blocks at or below the lowest key height are skipped. Batches are
+        decrypted concurrently but committed to the checkpoint in height order,
+        so an interrupted scan never records progress past a gap.
+
+        Returns:
+            List of notes found during this call
+        """
+        executor = self._get_executor()
+        pending: Deque[Tuple[int, List[NoteLocation], List[bytes], Future]] = deque()
+        found: List[FoundNote] = []
+        batch: List[Block] = []
+
+        def submit() -> None:
+            notes, locations, commitments = self._collect_notes(batch)
+            future = executor.submit(_scan_notes, notes, self.viewing_keys)
+            pending.append((batch[-1].height, locations, commitments, future))
+            while len(pending) >= self.max_pending:
+                found.extend(self._complete(*pending.popleft()))
+
+        expected = self.height + 1
+        for block in blocks:
+            if block.height < expected:
+                continue
+            if block.height != expected:
+                raise ValueError(f"Invalid block height: expected {expected}, got {block.height}")
+            expected += 1
+            batch.append(block)
+            if len(batch) >= self.blocks_per_batch:
+                submit()
+                batch = []
+        if batch:
+            submit()
+        while pending:
+            found.extend(self._complete(*pending.popleft()))
+        self.save_checkpoint()
+        return found
@@ -0,0 +1,372 @@
+# Zensia Synthetic Workload Generator and Ingest Pipeline
+#
+# Usage:
+#   python zensia_workload.py generate --count 1000000 --output txs.ndjson
+#   python zensia_workload.py ingest txs.ndjson --workers 4
+
+import argparse
+import bisect
+import hashlib
+import json
+import random
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+from zensia_core_implementation import Hash, Address
+from zensia_transactions import Transaction
+from zensia_privacy import ConfidentialTransaction
+from zensia_blockchain import Block, BlockchainState
+from zensia_mempool import TransactionPool
+
+AnyTransaction = Union[Transaction, ConfidentialTransaction]
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_BINARY = "binary"
+
+# Binary records are framed by a 4-byte length and start with a type byte
+RECORD_LENGTH = struct.Struct(">I")
+TYPE_TRANSFER = 1
+TYPE_CONFIDENTIAL = 2
+# tx_hash, sender, recipient, amount, nonce, timestamp, signature (zeros if unsigned)
+TRANSFER_FORMAT = struct.Struct(">32s20s20sQQQ32s")
+
+@dataclass
+class WorkloadConfig:
+    """Shape of a synthetic transaction stream"""
+    num_accounts: int = 10000
+    zipf_exponent: float = 1.1  # Sender skew; 0 is uniform
+    conflict_rate: float = 0.0  # Fraction of transactions that conflict with an earlier one
+    confidential_rate: float = 0.0  # Fraction of confidential transactions
+    seed: int = 0
+    start_timestamp: int = 1700000000
+    max_amount: int = 100
+
+class WorkloadGenerator:
+    """
+    Seeded, constant-memory stream of transparent and confidential transactions
+
+    Memory is proportional to the account count (keys, Zipf table and next
+    nonces), not to the number of transactions generated. Transparent
+    transfers carry the correct next nonce for their sender; conflicting
+    transfers reuse the sender's previous nonce and conflicting confidential
+    transactions respend a recent note.
+    """
+
+    def __init__(self, config: WorkloadConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.private_keys: List[bytes] = []
+        self.addresses: List[Address] = []
+        for i in range(config.num_accounts):
+            private_key = hashlib.sha256(f"{config.seed}:{i}".encode('utf-8')).digest()
+            self.private_keys.append(private_key)
+            self.addresses.append(Address.from_public_key(hashlib.sha256(private_key).digest()))
+        self.nonces = [0] * config.num_accounts
+
+        # Cumulative Zipf weights over account ranks
+        self._cumulative: List[float] = []
+        total = 0.0
+        for rank in range(1, config.num_accounts + 1):
+            total += 1.0 / rank ** config.zipf_exponent
+            self._cumulative.append(total)
+
+        self._recent_notes: Deque[Tuple[int, bytes]] = deque(maxlen=1024)  # (sender, note)
+        self._timestamp = config.start_timestamp
+        self.generated = 0
+
+    def _sender(self) -> int:
+        point = self.rng.random() * self._cumulative[-1]
+        return min(bisect.bisect_left(self._cumulative, point), self.config.num_accounts - 1)
+
+    def _recipient(self, sender: int) -> int:
+        # Never the sender: self-transfers would double-count the nonce
+        return (sender + self.rng.randrange(1, self.config.num_accounts)) % self.config.num_accounts
+
+    def _transfer(self, sender: int) -> Transaction:
+        conflict = self.nonces[sender] > 0 and self.rng.random() < self.config.conflict_rate
+        nonce = self.nonces[sender] - 1 if conflict else self.nonces[sender]
+        if not conflict:
+            self.nonces[sender] += 1
+        tx = Transaction.create(self.addresses[sender], self.addresses[self._recipient(sender)],
+                                self.rng.randrange(1, self.config.max_amount + 1), nonce,
+                                timestamp=self._timestamp)
+        tx.sign(self.private_keys[sender])
+        return tx
+
+    def _confidential(self, sender: int) -> ConfidentialTransaction:
+        if self._recent_notes and self.rng.random() < self.config.conflict_rate:
+            sender, note = self._recent_notes[self.rng.randrange(len(self._recent_notes))]
+        else:
+            note = self.rng.randbytes(32)
+            self._recent_notes.append((sender, note))
+        value = self.rng.randrange(1, self.config.max_amount + 1)
+        tx = ConfidentialTransaction()
+        tx.create(
+            inputs=[(note, value, self.rng.randbytes(32))],
+            outputs=[(self.addresses[self._recipient(sender)], value)],
+            sender_private_key=self.private_keys[sender],
+            blinding_factors=[self.rng.randbytes(32)]
+        )
+        return tx
+
+    def __iter__(self) -> Iterator[AnyTransaction]:
+        while True:
+            yield self.next()
+
+    def next(self) -> AnyTransaction:
+        """Generate the next transaction"""
+        self.generated += 1
+        if self.generated % 1000 == 0:
+            self._timestamp += 1  # Deterministic clock: 1000 transactions per second
+        sender = self._sender()
+        if self.rng.random() < self.config.confidential_rate:
+            return self._confidential(sender)
+        return self._transfer(sender)
+
+    def generate(self, count: int) -> Iterator[AnyTransaction]:
+        for _ in range(count):
+            yield self.next()
+
+    def fund(self, state: BlockchainState, balance: int) -> None:
+        """Give every generated account a starting balance"""
+        for address in self.addresses:
+            state.get_account(address).balance = balance
+
+# Encoding
+
+def encode_ndjson(tx: AnyTransaction) -> str:
+    """Encode a transaction as one NDJSON line"""
+    return json.dumps(tx.to_json(), separators=(',', ':')) + "\n"
+
+def decode_ndjson(line: Union[str, bytes]) -> AnyTransaction:
+    """Decode one NDJSON line"""
+    data = json.loads(line)
+    if data.get("type") == "confidential":
+        return ConfidentialTransaction.from_json(data)
+    return Transaction.from_json(data)
+
+def _pack_list(items: List[bytes]) -> bytes:
+    return struct.pack(">H", len(items)) + b''.join(struct.pack(">H", len(i)) + i for i in items)
+
+def _unpack_list(data: bytes, offset: int) -> Tuple[List[bytes], int]:
+    (count,) = struct.unpack_from(">H", data, offset)
+    offset += 2
+    items = []
+    for _ in range(count):
+        (length,) = struct.unpack_from(">H", data, offset)
+        offset += 2
+        items.append(data[offset:offset + length])
+        offset += length
+    return items, offset
+
+def encode_binary(tx: AnyTransaction) -> bytes:
+    """Encode a transaction as a length-framed binary record"""
+    if isinstance(tx, Transaction):
+        body = bytes([TYPE_TRANSFER]) + TRANSFER_FORMAT.pack(
+            tx.tx_hash, tx.sender, tx.recipient, tx.amount, tx.nonce, tx.timestamp, tx.signature or b'')
+    else:
+        body = (bytes([TYPE_CONFIDENTIAL]) + _pack_list(tx.nullifiers) + _pack_list(tx.commitments)
+                + _pack_list(tx.encrypted_notes) + _pack_list([tx.proof] if tx.proof else []))
+    return RECORD_LENGTH.pack(len(body)) + body
+
+def decode_binary(body: bytes) -> AnyTransaction:
+    """Decode a binary record body (without its length frame)"""
+    if body[0] == TYPE_TRANSFER:
+        tx_hash, sender, recipient, amount, nonce, timestamp, signature = TRANSFER_FORMAT.unpack_from(body, 1)
+        return Transaction(Hash(tx_hash), Address(sender), Address(recipient), amount, nonce,
+                           timestamp, signature if any(signature) else None)
+    if body[0] == TYPE_CONFIDENTIAL:
+        tx = ConfidentialTransaction()
+        tx.nullifiers, offset = _unpack_list(body, 1)
+        tx.commitments, offset = _unpack_list(body, offset)
+        tx.encrypted_notes, offset = _unpack_list(body, offset)
+        proof, offset = _unpack_list(body, offset)
+        tx.proof = proof[0] if proof else None
+        return tx
+    raise ValueError(f"Unknown transaction record type {body[0]}")
+
+def write_transactions(txs: Iterable[AnyTransaction], f: BinaryIO, fmt: str = FORMAT_NDJSON) -> int:
+    """Stream transactions to a binary file object, returning the count written"""
+    count = 0
+    for tx in txs:
+        f.write(encode_ndjson(tx).encode('utf-8') if fmt == FORMAT_NDJSON else encode_binary(tx))
+        count += 1
+    return count
+
+def iter_records(f: BinaryIO, fmt: str = FORMAT_NDJSON) -> Iterator[bytes]:
+    """Stream raw, still-encoded records from a binary file object"""
+    if fmt == FORMAT_NDJSON:
+        for line in f:
+            if line.strip():
+                yield line
+        return
+    while True:
+        frame = f.read(RECORD_LENGTH.size)
+        if len(frame) < RECORD_LENGTH.size:
+            return
+        (length,) = RECORD_LENGTH.unpack(frame)
+        body = f.read(length)
+        if len(body) != length:
+            raise ValueError("Truncated transaction record")
+        yield body
+
+def read_transactions(f: BinaryIO, fmt: str = FORMAT_NDJSON) -> Iterator[AnyTransaction]:
+    """Stream decoded transactions from a binary file object"""
+    decode = decode_ndjson if fmt == FORMAT_NDJSON else decode_binary
+    for record in iter_records(f, fmt):
+        yield decode(record)
+
+# Ingest
+
+@dataclass
+class IngestStats:
+    """Counters for an ingest run"""
+    records: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    batches: int = 0
+    pool_drains: int = 0
+    seconds: float = 0.0
+
+def _decode_batch(decode: Callable[[bytes], AnyTransaction], batch: List[bytes]) -> List[AnyTransaction]:
+    return [decode(record) for record in batch]
+
+def ingest(records: Iterable[bytes], pool: TransactionPool, fmt: str = FORMAT_NDJSON,
+           batch_size: int = 1000, workers: int = 4, max_pending: int = 8,
+           max_pool_size: Optional[int] = None,
+           on_pool_full: Optional[Callable[[TransactionPool], None]] = None) -> IngestStats:
+    """
+    Decode records in worker threads and admit them to a transaction pool
+
+    Records are read in batches; at most max_pending batches are decoding
+    at once, so a fast reader cannot run ahead of decoding. Batches are
+    admitted in input order, which keeps per-sender nonces in sequence.
+    When the pool reaches max_pool_size, on_pool_full is called (typically
+    to build and import a block) before admission continues. If that leaves
+    the pool full, the next call waits until another max_pool_size
+    transactions have been admitted.
+
+    Args:
+        records: Raw records, e.g. from iter_records
+        pool: Pool to admit transactions into
+        fmt: FORMAT_NDJSON or FORMAT_BINARY
+        batch_size: Records per decode batch
+        workers: Decoder threads
+        max_pending: Maximum batches being decoded at once
+        max_pool_size: Pool size that triggers on_pool_full
+        on_pool_full: Callback that drains the pool
+    """
+    decode = decode_ndjson if fmt == FORMAT_NDJSON else decode_binary
+    stats = IngestStats()
+    start = time.perf_counter()
+    pending: Deque = deque()
+
+    drain_at = max_pool_size
+
+    def admit(txs: List[AnyTransaction]) -> None:
+        nonlocal drain_at
+        stats.batches += 1
+        for tx in txs:
+            if drain_at is not None and on_pool_full is not None and len(pool) >= drain_at:
+                on_pool_full(pool)
+                stats.pool_drains += 1
+                if len(pool) >= max_pool_size:
+                    drain_at = len(pool) + max_pool_size  # Nothing drainable; back off
+                else:
+                    drain_at = max_pool_size
+            if pool.add(tx):
+                stats.admitted += 1
+            else:
+                stats.rejected += 1
+
+    with ThreadPoolExecutor(workers) as executor:
+        batch: List[bytes] = []
+        for record in records:
+            batch.append(record)
+            stats.records += 1
+            if len(batch) < batch_size:
+                continue
+            pending.append(executor.submit(_decode_batch, decode, batch))
+            batch = []
+            while len(pending) >= max_pending:
+                admit(pending.popleft().result())
+        if batch:
+            pending.append(executor.submit(_decode_batch, decode, batch))
+        while pending:
+            admit(pending.popleft().result())
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+def block_builder(state: BlockchainState, validator: Address, validator_private_key: bytes,
+                  block_size: int = 1000) -> Callable[[TransactionPool], None]:
+    """Return an on_pool_full callback that builds, signs and imports one block from the pool"""
+
+    def build(pool: TransactionPool) -> None:
+        txs = pool.select(block_size)
+        if not txs:
+            return  # Nothing selectable; don't import an empty block
+        block = Block.create(state.height + 1, state.last_block_hash or Hash.from_bytes(b'genesis'),
+                             txs, validator)
+        block.sign(validator_private_key)
+        state.apply_block(block)
+        pool.remove_block(block)
+
+    return build
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Zensia synthetic workload tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="write a synthetic transaction stream")
+    gen.add_argument("--count", type=int, default=100000)
+    gen.add_argument("--accounts", type=int, default=10000)
+    gen.add_argument("--zipf", type=float, default=1.1)
+    gen.add_argument("--conflict-rate", type=float, default=0.0)
+    gen.add_argument("--confidential-rate", type=float, default=0.0)
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("--format", choices=(FORMAT_NDJSON, FORMAT_BINARY), default=FORMAT_NDJSON)
+    gen.add_argument("--output", required=True)
+
+    ing = commands.add_parser("ingest", help="decode a stream into a pool, building blocks as it fills")
+    ing.add_argument("input")
+    ing.add_argument("--accounts", type=int, default=10000)
+    ing.add_argument("--seed", type=int, default=0)
+    ing.add_argument("--format", choices=(FORMAT_NDJSON, FORMAT_BINARY), default=FORMAT_NDJSON)
+    ing.add_argument("--workers", type=int, default=4)
+    ing.add_argument("--block-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        config = WorkloadConfig(num_accounts=args.accounts, zipf_exponent=args.zipf,
+                                conflict_rate=args.conflict_rate,
+                                confidential_rate=args.confidential_rate, seed=args.seed)
+        with open(args.output, "wb") as f:
+            count = write_transactions(WorkloadGenerator(config).generate(args.count), f, args.format)
+        print(f"Wrote {count} transactions to {args.output}")
+        return 0
+
+    # Recreate the generator's accounts so the stream's senders are funded
+    generator = WorkloadGenerator(WorkloadConfig(num_accounts=args.accounts, seed=args.seed))
+    state = BlockchainState()
+    generator.fund(state, 10 ** 12)
+    pool = TransactionPool(state)
+    build = block_builder(state, generator.addresses[0], generator.private_keys[0], args.block_size)
+    with open(args.input, "rb") as f:
+        stats = ingest(iter_records(f, args.format), pool, args.format, workers=args.workers,
+                       max_pool_size=args.block_size * 4, on_pool_full=build)
+    while len(pool):
+        height = state.height
+        build(pool)
+        if state.height == height:
+            break
+    print(f"Ingested {stats.records} records in {stats.seconds:.2f}s: "
+          f"{stats.admitted} admitted, {stats.rejected} rejected, chain height {state.height}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))